@@ -15,11 +15,20 @@ class LorentzianConfig(object):
         self.downsample_factor = 4
         self.feature_list = ["RSI", "WT", "CCI", "ADX"]
         self.custom_feature_count = 2
+        self.feature_normalization = "minmax"  # "minmax", "zscore" or "none"
+        self.normalization_window = 200
+        # "float32" stores features, normalization windows and KNN memory in half the space
+        self.feature_precision = "float64"
+        # Replays the seeding history through both precisions and logs how far they diverge
+        self.validate_precision = False
         
         # ML model parameters
         self.n_neighbors = 8
         self.lorentzian_weight = 0.5
         self.reset_factor = 0.1
+        self.knn_memory_size = 2000
+        # Apply label updates on a worker thread and query an immutable snapshot
+        self.knn_background_training = False
         
         # Signal generation parameters
         self.volatility_filter = True
@@ -33,6 +42,8 @@ class LorentzianConfig(object):
         self.kernel_lookback = 8
         self.kernel_relative_weighting = 8.0
         self.kernel_regression_level = 25
+        # Extra (kernel, h, r) smoothing variants evaluated in the same bank, e.g. ("gaussian", 6.0, 0.0)
+        self.kernel_variants = []
         
         # Trade management parameters
         self.use_dynamic_exits = False
@@ -40,7 +51,24 @@ class LorentzianConfig(object):
         
         # Risk management parameters
         self.risk_per_trade = 0.01
+        # Cap on one position as a fraction of portfolio value
+        self.max_position_size = 0.1
         self.max_open_trades = 5
+        self.exit_wheel_size = 64
+        
+        # Checkpoint parameters, live mode only (0 disables periodic snapshots)
+        self.checkpoint_interval_bars = 60
+        self.checkpoint_key = "lorentzian/checkpoint.npz"
+        
+        # Hot-reload parameters (0 disables polling, empty path reads GetParameter only)
+        self.hot_reload_interval_bars = 1
+        self.hot_reload_file = ""
+        
+        # Memory instrumentation (0 disables sampling; assert raises at the end of a run if a component keeps growing)
+        self.memory_profile_interval_bars = 0
+        self.memory_growth_tolerance = 0.1
+        self.memory_trace_allocations = False
+        self.memory_assert_bounded = False
         
         # Visualization parameters
         self.show_bar_colors = True
@@ -56,6 +84,9 @@ class LorentzianAlgorithm(QCAlgorithm):
         self.AddForex(self.config.symbol, self.config.timeframe)
         
         # Initialize your ML model, indicators, etc. here
+        # Imported here so that loading LorentzianConfig stays free of component modules
+        from exit_scheduler import ExitScheduler
+        self.exit_scheduler = ExitScheduler(self, self.config.exit_wheel_size, self.config.max_open_trades)
         
         # Set up the parameters that can be adjusted from the web UI
         self.add_parameters()
@@ -67,19 +98,21 @@ class LorentzianAlgorithm(QCAlgorithm):
         # Add more parameters as needed
     
     def OnData(self, data):
+        expired = self.exit_scheduler.advance()
         if not self.Portfolio[self.config.symbol].Invested:
-            if self.should_enter_trade():
+            if self.should_enter_trade() and self.exit_scheduler.schedule(self.config.symbol, self.config.fixed_exit_bars):
                 self.SetHoldings(self.config.symbol, self.risk_per_trade)
-        elif self.should_exit_trade():
+        elif self.should_exit_trade(expired):
+            self.exit_scheduler.cancel(self.config.symbol)
             self.Liquidate(self.config.symbol)
     
     def should_enter_trade(self):
         # Implement your entry logic here
         pass
     
-    def should_exit_trade(self):
-        # Implement your exit logic here
-        pass
+    def should_exit_trade(self, expired):
+        # Bar-count exits come from the scheduler, dynamic exits cancel their entry there
+        return self.config.symbol in expired
     
     def OnEndOfAlgorithm(self):
         # Perform any cleanup or final analysis here
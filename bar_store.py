@@ -0,0 +1,143 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+_DTYPES = {'time': np.dtype('<M8[us]'), **{column: np.dtype('<f8') for column in BAR_COLUMNS}}
+
+
+def to_datetime64(times) -> np.ndarray:
+    # datetimes, strings or datetime64 values -> naive UTC datetime64[us]
+    index = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(times)))
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values.astype(_DTYPES['time'])
+
+
+class LocalBarStore:
+    # Append-only OHLCV columns per symbol and resolution, one raw little-endian
+    # file per column under root/<resolution>/<symbol>/, read back through
+    # np.memmap so range slices are views into the page cache, not copies.
+    # The time column is written last and defines how many rows are committed,
+    # so an interrupted append is cut back on the next one.
+    def __init__(self, root: str):
+        self.root = root
+        # directory -> (rows, {column: memmap}) for the files as last read
+        self._maps: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {}
+
+    def _directory(self, symbol, resolution) -> str:
+        name = re.sub(r'[^A-Za-z0-9._-]', '_', str(symbol))
+        return os.path.join(self.root, str(resolution), name)
+
+    def _path(self, directory: str, column: str) -> str:
+        return os.path.join(directory, f"{column}.bin")
+
+    def resolutions(self) -> List[str]:
+        return sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []
+
+    def symbols(self, resolution) -> List[str]:
+        directory = os.path.join(self.root, str(resolution))
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def rows(self, symbol, resolution) -> int:
+        path = self._path(self._directory(symbol, resolution), 'time')
+        return os.path.getsize(path) // _DTYPES['time'].itemsize if os.path.exists(path) else 0
+
+    def last_time(self, symbol, resolution) -> Optional[np.datetime64]:
+        columns = self.read(symbol, resolution)
+        return columns['time'][-1] if len(columns['time']) else None
+
+    def append(self, symbol, resolution, time, open_, high, low, close, volume) -> int:
+        # Rows at or before the last stored time are skipped, so overlapping
+        # history can be appended incrementally. Returns the rows written.
+        time = to_datetime64(time)
+        values = {column: np.asarray(array, dtype=_DTYPES[column])
+                  for column, array in zip(BAR_COLUMNS, (open_, high, low, close, volume))}
+        if any(len(array) != len(time) for array in values.values()):
+            raise ValueError("time and OHLCV columns must have the same length")
+        if len(time) > 1 and not (np.diff(time) > np.timedelta64(0, 'us')).all():
+            raise ValueError("bar times must be strictly increasing")
+
+        directory = self._directory(symbol, resolution)
+        os.makedirs(directory, exist_ok=True)
+        committed = self.rows(symbol, resolution)
+        if committed:
+            last = np.fromfile(self._path(directory, 'time'), dtype=_DTYPES['time'], count=1,
+                               offset=(committed - 1) * _DTYPES['time'].itemsize)[0]
+            start = int(np.searchsorted(time, last, side='right'))
+            time = time[start:]
+            values = {column: array[start:] for column, array in values.items()}
+        if len(time) == 0:
+            return 0
+
+        for column in BAR_COLUMNS:
+            path = self._path(directory, column)
+            with open(path, 'ab') as f:
+                f.truncate(committed * _DTYPES[column].itemsize)
+                f.write(values[column].tobytes())
+        with open(self._path(directory, 'time'), 'ab') as f:
+            # Drops a partial row left by an interrupted write
+            f.truncate(committed * _DTYPES['time'].itemsize)
+            f.write(time.tobytes())
+        self._maps.pop(directory, None)
+        return len(time)
+
+    def append_frame(self, symbol, resolution, frame: pd.DataFrame) -> int:
+        # A History() frame for one symbol: time index (or a (symbol, time)
+        # MultiIndex) and open/high/low/close/volume columns
+        times = frame.index.get_level_values(-1)
+        volume = frame['volume'].values if 'volume' in frame else np.zeros(len(frame))
+        return self.append(symbol, resolution, times, frame['open'].values, frame['high'].values,
+                           frame['low'].values, frame['close'].values, volume)
+
+    def _columns(self, symbol, resolution) -> Dict[str, np.ndarray]:
+        directory = self._directory(symbol, resolution)
+        rows = self.rows(symbol, resolution)
+        cached = self._maps.get(directory)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+        if rows == 0:
+            columns = {column: np.empty(0, dtype=dtype) for column, dtype in _DTYPES.items()}
+        else:
+            columns = {column: np.memmap(self._path(directory, column), dtype=dtype, mode='r', shape=(rows,))
+                       for column, dtype in _DTYPES.items()}
+        self._maps[directory] = (rows, columns)
+        return columns
+
+    def read(self, symbol, resolution, start=None, end=None) -> Dict[str, np.ndarray]:
+        # Zero-copy views of the rows with start <= time < end
+        columns = self._columns(symbol, resolution)
+        times = columns['time']
+        lo = 0 if start is None else int(np.searchsorted(times, to_datetime64(start)[0], side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, to_datetime64(end)[0], side='left'))
+        return {column: array[lo:hi] for column, array in columns.items()}
+
+    def frame(self, symbol, resolution, start=None, end=None) -> pd.DataFrame:
+        # Same shape as a single-symbol History() call; this one copies
+        columns = self.read(symbol, resolution, start, end)
+        index = pd.MultiIndex.from_arrays(
+            [[str(symbol)] * len(columns['time']), pd.DatetimeIndex(np.asarray(columns['time']))],
+            names=['symbol', 'time'])
+        return pd.DataFrame({column: np.asarray(columns[column]) for column in BAR_COLUMNS}, index=index)
+
+    def aligned(self, symbols: List, resolution, start=None, end=None, column: str = 'close',
+                how: str = 'inner') -> Tuple[np.ndarray, np.ndarray]:
+        # (times, (symbols, times) matrix) on the shared timestamps ('inner') or
+        # on every timestamp with NaN where a symbol has no bar ('outer')
+        reads = [self.read(symbol, resolution, start, end) for symbol in symbols]
+        if not reads:
+            return np.empty(0, dtype=_DTYPES['time']), np.empty((0, 0))
+        times = reads[0]['time']
+        for columns in reads[1:]:
+            times = np.intersect1d(times, columns['time']) if how == 'inner' else np.union1d(times, columns['time'])
+        times = np.asarray(times)
+
+        matrix = np.full((len(symbols), len(times)), np.nan)
+        for row, columns in enumerate(reads):
+            position = np.searchsorted(columns['time'], times)
+            found = position < len(columns['time'])
+            found[found] = columns['time'][position[found]] == times[found]
+            matrix[row, found] = columns[column][position[found]]
+        return times, matrix
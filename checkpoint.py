@@ -0,0 +1,155 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import io
+import zipfile
+import zlib
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def symbol_key(symbol) -> str:
+    # Security identifiers survive restarts, tickers can be remapped
+    return str(symbol.ID) if hasattr(symbol, 'ID') else str(symbol)
+
+
+def to_epoch_us(time: datetime) -> int:
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return (time - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def pack_windows(windows: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.array([len(w) for w in windows], dtype=np.int64)
+    matrix = np.full((len(windows), int(lengths.max()) if len(windows) else 0), np.nan)
+    for row, window in enumerate(windows):
+        matrix[row, :len(window)] = window
+    return matrix, lengths
+
+
+def unpack_windows(matrix: np.ndarray, lengths: np.ndarray) -> List[np.ndarray]:
+    return [matrix[row, :int(length)] for row, length in enumerate(lengths)]
+
+
+class StateCheckpointer:
+    def __init__(self, algorithm: QCAlgorithm, key: str = "lorentzian/checkpoint.npz", interval_bars: int = 60):
+        self.algorithm = algorithm
+        self.key = key
+        self.interval_bars = interval_bars
+
+        # name -> object exposing get_state() / set_state(state)
+        self.providers: Dict[str, Any] = {}
+        # name -> live {Symbol: provider} mapping, read at save time
+        self.symbol_providers: Dict[str, Dict[Symbol, Any]] = {}
+
+        self.bars_since_save = 0
+        self.last_saved: Optional[datetime] = None
+
+    def register(self, name: str, provider: Any):
+        self.providers[name] = provider
+
+    def register_symbols(self, name: str, providers: Dict[Symbol, Any]):
+        self.symbol_providers[name] = providers
+
+    def on_bar(self, time: datetime) -> bool:
+        self.bars_since_save += 1
+        if self.interval_bars <= 0 or self.bars_since_save < self.interval_bars:
+            return False
+        self.save(time)
+        return True
+
+    def save(self, time: datetime):
+        payload = self.to_bytes(time)
+        self.algorithm.ObjectStore.SaveBytes(self.key, bytearray(payload))
+        self.bars_since_save = 0
+        self.last_saved = time
+
+    def restore(self, not_after: Optional[datetime] = None) -> Optional[datetime]:
+        # A snapshot saved after not_after (e.g. by a later backtest) is not applied
+        if not self.algorithm.ObjectStore.ContainsKey(self.key):
+            return None
+        try:
+            payload = bytes(self.algorithm.ObjectStore.ReadBytes(self.key))
+            saved_at = self.from_bytes(payload, not_after)
+        except Exception as e:
+            # Truncated or corrupt snapshots fall back to a full warm-up
+            self.algorithm.Log(f"Checkpoint {self.key} could not be restored: {str(e)}")
+            return None
+        self.last_saved = saved_at
+        self.algorithm.Log(f"Restored checkpoint {self.key} saved at {saved_at}")
+        return saved_at
+
+    def to_bytes(self, time: datetime) -> bytes:
+        arrays = {
+            '__version__': np.array([CHECKPOINT_FORMAT_VERSION], dtype=np.int32),
+            '__time__': np.array([to_epoch_us(time)], dtype=np.int64),
+        }
+        for name, provider in self.providers.items():
+            for field, value in provider.get_state().items():
+                arrays[f"{name}/{field}"] = np.asarray(value)
+        for name, providers in self.symbol_providers.items():
+            for symbol, provider in providers.items():
+                for field, value in provider.get_state().items():
+                    arrays[f"{name}/{symbol_key(symbol)}/{field}"] = np.asarray(value)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    def from_bytes(self, payload: bytes, not_after: Optional[datetime] = None) -> datetime:
+        saved_at, states, symbol_states = self.decode(payload)
+        if not_after is not None and saved_at > not_after:
+            raise ValueError(f"snapshot saved at {saved_at} is later than {not_after}")
+
+        # Nothing is applied until the whole archive decoded; if a provider then
+        # rejects its state, the ones already restored are put back as they were
+        previous = [(provider, provider.get_state()) for provider in self.providers.values()]
+        previous += [(provider, provider.get_state())
+                     for providers in self.symbol_providers.values() for provider in providers.values()]
+        try:
+            for name, provider in self.providers.items():
+                if name in states:
+                    provider.set_state(states[name])
+            for name, providers in self.symbol_providers.items():
+                saved = symbol_states.get(name, {})
+                for symbol, provider in providers.items():
+                    state = saved.get(symbol_key(symbol))
+                    if state is not None:
+                        provider.set_state(state)
+        except Exception:
+            for provider, state in previous:
+                provider.set_state(state)
+            raise
+
+        return saved_at
+
+    @staticmethod
+    def decode(payload: bytes) -> Tuple[datetime, Dict[str, Dict[str, np.ndarray]], Dict[str, Dict[str, Dict[str, np.ndarray]]]]:
+        # Reads every array into memory, so a truncated archive fails here and not half-way through set_state
+        states: Dict[str, Dict[str, np.ndarray]] = {}
+        symbol_states: Dict[str, Dict[str, Dict[str, np.ndarray]]] = {}
+        try:
+            with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+                version = int(archive['__version__'][0])
+                if version != CHECKPOINT_FORMAT_VERSION:
+                    raise ValueError(f"unsupported checkpoint version {version}, expected {CHECKPOINT_FORMAT_VERSION}")
+                saved_at = from_epoch_us(archive['__time__'][0])
+
+                for entry in archive.files:
+                    parts = entry.split('/')
+                    if len(parts) == 2:
+                        states.setdefault(parts[0], {})[parts[1]] = archive[entry]
+                    elif len(parts) == 3:
+                        symbol_states.setdefault(parts[0], {}).setdefault(parts[1], {})[parts[2]] = archive[entry]
+        except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+            raise ValueError(f"corrupt checkpoint: {str(e)}") from e
+        return saved_at, states, symbol_states
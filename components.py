@@ -0,0 +1,97 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import importlib
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+ComponentFactory = Callable[[Any, 'ComponentRegistry'], Any]
+
+
+class ComponentSpec:
+    def __init__(self, name: str, module: str, factory: ComponentFactory,
+                 enabled: Optional[Callable[[Any], bool]] = None):
+        self.name = name
+        self.module = module
+        self.factory = factory
+        self.enabled = enabled
+
+
+class ComponentRegistry:
+    def __init__(self, algorithm: QCAlgorithm, config):
+        self.algorithm = algorithm
+        self.config = config
+        self.specs: Dict[str, ComponentSpec] = {}
+        self.instances: Dict[str, Any] = {}
+        # name -> {'import': ms, 'build': ms}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._nested: List[float] = []
+
+    def register(self, name: str, module: str, factory: ComponentFactory,
+                 enabled: Optional[Callable[[Any], bool]] = None):
+        self.specs[name] = ComponentSpec(name, module, factory, enabled)
+
+    def is_enabled(self, name: str) -> bool:
+        spec = self.specs.get(name)
+        if spec is None:
+            return False
+        return spec.enabled is None or bool(spec.enabled(self.config))
+
+    def get(self, name: str) -> Any:
+        # Disabled components are never imported, let alone constructed
+        if name in self.instances:
+            return self.instances[name]
+        if not self.is_enabled(name):
+            return None
+
+        spec = self.specs[name]
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.module)
+            imported = time.perf_counter()
+            instance = spec.factory(module, self)
+        finally:
+            # Unwound even when the import or the factory raises, or every later timing is off
+            built = time.perf_counter()
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += built - start
+
+        # Dependencies built inside the factory are reported on their own line
+        self.timings[name] = {
+            'import': (imported - start) * 1000,
+            'build': (built - imported - nested) * 1000
+        }
+        self.instances[name] = instance
+        return instance
+
+    def build_all(self) -> Dict[str, Any]:
+        for name in self.specs:
+            self.get(name)
+        return self.instances
+
+    def disabled(self) -> List[str]:
+        return [name for name in self.specs if not self.is_enabled(name)]
+
+    @contextmanager
+    def measure(self, name: str):
+        # Times a startup phase that is not a component, e.g. checkpoint restore
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = {'import': 0.0, 'build': (time.perf_counter() - start) * 1000}
+
+    def timing_report(self) -> str:
+        rows = sorted(self.timings.items(), key=lambda item: -sum(item[1].values()))
+        total = sum(sum(t.values()) for _, t in rows)
+        lines = ["--- Startup Timing ---"]
+        for name, timing in rows:
+            lines.append(f"{name}: import={timing['import']:.1f}ms build={timing['build']:.1f}ms")
+        lines.append(f"total: {total:.1f}ms")
+        disabled = self.disabled()
+        if disabled:
+            lines.append(f"disabled: {', '.join(disabled)}")
+        return "\n".join(lines)
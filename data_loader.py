@@ -1,12 +1,24 @@
 from AlgorithmImports import *
-from typing import List, Dict
+from typing import Dict, Iterator, List, Tuple
+from symbol_registry import SymbolRegistry, SlotMap
+from bar_store import BAR_COLUMNS, LocalBarStore
 
 class DataLoader:
-    def __init__(self, algorithm: QCAlgorithm, symbols: List[str], resolution: Resolution):
+    def __init__(self, algorithm: QCAlgorithm, symbols: List[str], resolution: Resolution,
+                 registry: SymbolRegistry = None, store: LocalBarStore = None):
         self.algorithm = algorithm
-        self.symbols = [algorithm.AddEquity(s, resolution).Symbol for s in symbols]
+        self.registry = registry if registry is not None else SymbolRegistry(max(len(symbols), 1))
+        # With a local store, history comes from disk and symbols stay plain tickers
+        self.store = store
+        if store is not None:
+            self.symbols = list(symbols)
+        else:
+            self.symbols = [algorithm.AddEquity(s, resolution).Symbol for s in symbols]
         self.resolution = resolution
-        self.data = {s: None for s in self.symbols}
+        # Latest bar per registry slot
+        self.data = SlotMap(self.registry)
+        for symbol in self.symbols:
+            self.registry.add(symbol)
 
     def update(self, data: Slice) -> Dict[Symbol, TradeBar]:
         for symbol in self.symbols:
@@ -15,11 +27,44 @@ class DataLoader:
         return self.data
 
     def get_history(self, symbol: Symbol, periods: int) -> pd.DataFrame:
+        if self.store is not None:
+            rows = self.store.rows(symbol, self.resolution)
+            start = self.store.read(symbol, self.resolution)['time'][max(rows - periods, 0)] if rows else None
+            return self.store.frame(symbol, self.resolution, start)
         history = self.algorithm.History(symbol, periods, self.resolution)
         return history
 
+    def replay(self, start=None, end=None) -> Iterator[Tuple[np.datetime64, Dict[Symbol, pd.Series]]]:
+        # Steps through the store on the union of bar times, updating the latest
+        # bar of every symbol that has one, the way update() does with a Slice
+        if self.store is None:
+            raise ValueError("replay needs a LocalBarStore")
+        reads = {symbol: self.store.read(symbol, self.resolution, start, end) for symbol in self.symbols}
+        times = np.unique(np.concatenate([columns['time'] for columns in reads.values()])) if reads else []
+        cursors = {symbol: 0 for symbol in reads}
+        for time in times:
+            bars = {}
+            for symbol, columns in reads.items():
+                cursor = cursors[symbol]
+                if cursor < len(columns['time']) and columns['time'][cursor] == time:
+                    bars[symbol] = pd.Series({column: float(columns[column][cursor]) for column in BAR_COLUMNS}, name=time)
+                    cursors[symbol] = cursor + 1
+            for symbol, bar in bars.items():
+                self.data[symbol] = bar
+            yield time, bars
+
     def get_current_data(self, symbol: Symbol) -> TradeBar:
         return self.data.get(symbol)
 
     def get_all_current_data(self) -> Dict[Symbol, TradeBar]:
-        return self.data
\ No newline at end of file
+        return dict(self.data.items())
+
+    def add_symbol(self, symbol: Symbol):
+        if symbol not in self.symbols:
+            self.symbols.append(symbol)
+            self.registry.add(symbol)
+
+    def remove_symbol(self, symbol: Symbol):
+        if symbol in self.symbols:
+            self.symbols.remove(symbol)
+        self.data.pop(symbol)
\ No newline at end of file
@@ -40,11 +40,11 @@ class RiskManager:
         return abs(current_position + quantity) <= max_allowed
 
 class TradeManager:
-    def __init__(self, algorithm: QCAlgorithm):
+    def __init__(self, algorithm: QCAlgorithm, max_position_size: float = 0.1):
         self.algorithm = algorithm
         self.executor = TradeExecutor(algorithm)
         self.position_manager = PositionManager(algorithm)
-        self.risk_manager = RiskManager(algorithm)
+        self.risk_manager = RiskManager(algorithm, max_position_size)
 
     def place_trade(self, symbol: Symbol, direction: int):
         quantity = self.risk_manager.calculate_position_size(symbol)
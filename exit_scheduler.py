@@ -0,0 +1,98 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+from typing import Dict, List, Tuple
+from checkpoint import symbol_key
+
+
+class ExitScheduler:
+    # Hashed timing wheel over bar counts: a position due in `bars` bars sits in
+    # slot (now + bars) % wheel_size, so scheduling, cancelling and expiring are O(1)
+    # for horizons shorter than the wheel, whatever the number of open positions.
+    def __init__(self, algorithm: QCAlgorithm, wheel_size: int = 64, max_open_trades: int = 5):
+        self.algorithm = algorithm
+        self.wheel_size = wheel_size
+        self.max_open_trades = max_open_trades
+        self.bar = 0
+        # slot -> {symbol: expiry bar}
+        self.wheel: List[Dict[Symbol, int]] = [{} for _ in range(wheel_size)]
+        # symbol -> (expiry bar, direction)
+        self.entries: Dict[Symbol, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, symbol: Symbol) -> bool:
+        return symbol in self.entries
+
+    def can_open(self, symbol: Symbol = None) -> bool:
+        return symbol in self.entries or len(self.entries) < self.max_open_trades
+
+    def schedule(self, symbol: Symbol, bars: int, direction: int = 1) -> bool:
+        # Registers an entry, or moves an existing one; False when max_open_trades is reached
+        if not self.can_open(symbol):
+            return False
+        self.cancel(symbol)
+        expiry = self.bar + max(int(bars), 1)
+        self.wheel[expiry % self.wheel_size][symbol] = expiry
+        self.entries[symbol] = (expiry, direction)
+        return True
+
+    def reschedule(self, symbol: Symbol, bars: int) -> bool:
+        if symbol not in self.entries:
+            return False
+        return self.schedule(symbol, bars, self.entries[symbol][1])
+
+    def cancel(self, symbol: Symbol) -> bool:
+        entry = self.entries.pop(symbol, None)
+        if entry is None:
+            return False
+        del self.wheel[entry[0] % self.wheel_size][symbol]
+        return True
+
+    def direction(self, symbol: Symbol) -> int:
+        entry = self.entries.get(symbol)
+        return entry[1] if entry is not None else 0
+
+    def remaining(self, symbol: Symbol) -> int:
+        entry = self.entries.get(symbol)
+        return entry[0] - self.bar if entry is not None else 0
+
+    def advance(self) -> List[Symbol]:
+        # Call once per bar; returns the symbols whose bar count ran out
+        self.bar += 1
+        bucket = self.wheel[self.bar % self.wheel_size]
+        if not bucket:
+            return []
+        # Entries further out than one turn of the wheel share the slot and stay
+        expired = [symbol for symbol, expiry in bucket.items() if expiry <= self.bar]
+        for symbol in expired:
+            del bucket[symbol]
+            del self.entries[symbol]
+        return expired
+
+    def on_kernel_turn(self, symbol: Symbol, turned: int) -> bool:
+        # Dynamic exit: the kernel turning against the position (down for a long,
+        # up for a short) closes it before its bar count runs out. `turned` is the
+        # direction the kernel turned to, +1 up or -1 down. Returns True if the
+        # entry was cancelled.
+        direction = self.direction(symbol)
+        if direction == 0 or turned != -direction:
+            return False
+        return self.cancel(symbol)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        symbols = list(self.entries.keys())
+        return {
+            'keys': np.array([symbol_key(symbol) for symbol in symbols], dtype=np.str_),
+            'remaining': np.array([self.remaining(symbol) for symbol in symbols], dtype=np.int64),
+            'direction': np.array([self.entries[symbol][1] for symbol in symbols], dtype=np.int8)
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        symbols = {symbol_key(symbol): symbol for symbol in self.algorithm.Securities.Keys}
+        for key, remaining, direction in zip(state['keys'], state['remaining'], state['direction']):
+            symbol = symbols.get(str(key))
+            if symbol is not None:
+                self.schedule(symbol, int(remaining), int(direction))
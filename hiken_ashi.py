@@ -1,7 +1,9 @@
 # data/heikin_ashi.py
 
 from AlgorithmImports import *
+import numpy as np
 from typing import Dict
+from checkpoint import symbol_key, to_epoch_us, from_epoch_us
 
 class HeikinAshi:
     def __init__(self, algorithm: QCAlgorithm):
@@ -55,4 +57,22 @@ class HeikinAshi:
                 bar.Volume
             )
 
-            ha_open = (ha_open + ha_close) / 2
\ No newline at end of file
+            ha_open = (ha_open + ha_close) / 2
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        symbols = list(self.previous_ha.keys())
+        bars = [self.previous_ha[symbol] for symbol in symbols]
+        return {
+            'keys': np.array([symbol_key(symbol) for symbol in symbols], dtype=np.str_),
+            'time': np.array([to_epoch_us(bar.Time) for bar in bars], dtype=np.int64),
+            'ohlcv': np.array([[bar.Open, bar.High, bar.Low, bar.Close, bar.Volume] for bar in bars],
+                              dtype=np.float64).reshape(len(bars), 5)
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        symbols = {symbol_key(symbol): symbol for symbol in self.algorithm.Securities.Keys}
+        for key, time, (o, h, l, c, v) in zip(state['keys'], state['time'], state['ohlcv']):
+            symbol = symbols.get(str(key))
+            if symbol is None:
+                continue
+            self.previous_ha[symbol] = TradeBar(from_epoch_us(time), symbol, o, h, l, c, v)
\ No newline at end of file
@@ -0,0 +1,158 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Changing these means re-subscribing data or rebuilding components, which only a restart can do
+RESTART_REQUIRED = {
+    'symbol', 'timeframe', 'feature_list', 'custom_feature_count', 'feature_precision',
+    'knn_memory_size', 'knn_background_training', 'use_kernel_filter', 'kernel_variants',
+    'exit_wheel_size', 'checkpoint_key', 'hot_reload_file',
+    'memory_profile_interval_bars', 'memory_trace_allocations'
+}
+
+
+class ConfigReloader:
+    def __init__(self, algorithm: QCAlgorithm, config, path: str = "", interval_bars: int = 1):
+        self.algorithm = algorithm
+        self.config = config
+        self.path = path
+        self.interval_bars = interval_bars
+
+        # Handlers run once per poll if any of their parameters changed,
+        # in the order they were bound
+        self.bindings: List[Tuple[Set[str], Callable[[], None]]] = []
+        # Parameters read from the config on every bar, nothing to rebuild
+        self.watched: Set[str] = set()
+        # name -> check run on the coerced value before it is written to the config
+        self.validators: Dict[str, Callable[[Any], bool]] = {}
+        self.bars_since_poll = 0
+        self.file_mtime: Optional[float] = None
+        self.file_values: Dict[str, Any] = {}
+        # name -> last rejected raw value, so a bad override is only logged once
+        self.rejected: Dict[str, Any] = {}
+        # name -> raw value whose handler failed; it is not retried until the value changes
+        self.failed: Dict[str, Any] = {}
+
+    def bind(self, parameters: List[str], handler: Callable[[], None]):
+        self.bindings.append((set(parameters), handler))
+
+    def watch(self, parameters: List[str]):
+        self.watched.update(parameters)
+
+    def validate(self, parameter: str, check: Callable[[Any], bool]):
+        self.validators[parameter] = check
+
+    def reloadable(self) -> Set[str]:
+        # Only what a handler rebuilds from or what is read live can change safely
+        bound = set().union(*(parameters for parameters, _ in self.bindings)) if self.bindings else set()
+        return (bound | self.watched) - RESTART_REQUIRED
+
+    def parameters(self) -> List[str]:
+        # Restart-only names are still looked at, so an override of one is reported
+        candidates = self.reloadable() | RESTART_REQUIRED
+        return [name for name, value in vars(self.config).items()
+                if name in candidates and isinstance(value, (bool, int, float, str, list))]
+
+    def poll(self) -> List[str]:
+        self.bars_since_poll += 1
+        if self.interval_bars <= 0 or self.bars_since_poll < self.interval_bars:
+            return []
+        self.bars_since_poll = 0
+
+        changed = []
+        previous: Dict[str, Any] = {}
+        raws: Dict[str, Any] = {}
+        file_values = self._read_file()
+        for name in self.parameters():
+            raw = file_values.get(name)
+            if raw is None:
+                raw = self.algorithm.GetParameter(name)
+            if raw is None or self.failed.get(name) == raw:
+                continue
+
+            current = getattr(self.config, name)
+            try:
+                value = self._coerce(raw, current)
+            except (TypeError, ValueError):
+                self._reject(name, raw, f"Ignoring invalid value {raw!r} for {name}")
+                continue
+            if value == current:
+                continue
+            if name in RESTART_REQUIRED:
+                self._reject(name, raw, f"{name} cannot be changed without a restart")
+                continue
+            check = self.validators.get(name)
+            if check is not None and not check(value):
+                self._reject(name, raw, f"Ignoring invalid value {raw!r} for {name}")
+                continue
+
+            previous[name], raws[name] = current, raw
+            setattr(self.config, name, value)
+            changed.append(name)
+
+        if changed:
+            changed = self.apply(changed, previous, raws)
+        return changed
+
+    def apply(self, changed: List[str], previous: Dict[str, Any] = None,
+              raws: Dict[str, Any] = None) -> List[str]:
+        # A handler that raises gets its parameters rolled back and is run again with
+        # them, so the config never holds a value the derived state was not built from
+        previous = previous or {}
+        raws = raws or {}
+        applied = list(changed)
+        changed_set = set(changed)
+        for parameters, handler in self.bindings:
+            names = parameters & changed_set
+            if not names:
+                continue
+            try:
+                handler()
+            except Exception as e:
+                rolled_back = [name for name in applied if name in names and name in previous]
+                for name in rolled_back:
+                    setattr(self.config, name, previous[name])
+                    self.failed[name] = raws.get(name)
+                applied = [name for name in applied if name not in rolled_back]
+                self.algorithm.Log(f"Could not reload {', '.join(sorted(names))}, kept the previous values: {str(e)}")
+                try:
+                    handler()
+                except Exception as restore_error:
+                    self.algorithm.Log(f"Could not restore {', '.join(sorted(names))}: {str(restore_error)}")
+        if applied:
+            self.algorithm.Log(f"Reloaded config: {', '.join(f'{n}={getattr(self.config, n)}' for n in applied)}")
+        return applied
+
+    def _reject(self, name: str, raw: Any, message: str):
+        if self.rejected.get(name) != raw:
+            self.rejected[name] = raw
+            self.algorithm.Log(message)
+
+    def _read_file(self) -> Dict[str, Any]:
+        if not self.path or not os.path.exists(self.path):
+            return self.file_values
+        mtime = os.path.getmtime(self.path)
+        if mtime != self.file_mtime:
+            try:
+                with open(self.path) as f:
+                    self.file_values = json.load(f)
+                self.file_mtime = mtime
+            except (OSError, ValueError) as e:
+                self.algorithm.Log(f"Could not read config file {self.path}: {str(e)}")
+        return self.file_values
+
+    def _coerce(self, raw: Any, current: Any) -> Any:
+        if isinstance(current, bool):
+            if isinstance(raw, str):
+                return raw.strip().lower() in ('true', '1', 'yes', 'on')
+            return bool(raw)
+        if isinstance(current, int):
+            return int(float(raw))
+        if isinstance(current, float):
+            return float(raw)
+        if isinstance(current, list):
+            return [x.strip() for x in raw.split(',')] if isinstance(raw, str) else list(raw)
+        return str(raw)
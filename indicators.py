@@ -1,7 +1,7 @@
 from AlgorithmImports import *
 import numpy as np
 import pandas as pd
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 
 class Indicators:
     @staticmethod
@@ -41,17 +41,23 @@ class Indicators:
     def cci(high: np.array, low: np.array, close: np.array, period: int = 20) -> np.array:
         tp = (high + low + close) / 3
         sma_tp = Indicators.sma(tp, period)
-        mad = np.mean(np.abs(tp - sma_tp))
+        # Mean absolute deviation of each window from its own mean, so a bar only sees its past
+        mad = np.full(len(tp), np.nan)
+        if len(tp) >= period:
+            windows = np.lib.stride_tricks.sliding_window_view(tp, period)
+            mad[period - 1:] = np.abs(windows - sma_tp[period - 1:, None]).mean(axis=1)
         cci = (tp - sma_tp) / (0.015 * mad)
         return cci
 
     @staticmethod
     def adx(high: np.array, low: np.array, close: np.array, period: int = 14) -> np.array:
-        tr = np.maximum(high - low, np.abs(high - np.roll(close, 1)), np.abs(low - np.roll(close, 1)))
+        # Previous bar's values, NaN on the first bar so nothing wraps around from the last one
+        prev_close = Indicators.shift(close)
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
         atr = Indicators.ema(tr, period)
         
-        up = high - np.roll(high, 1)
-        down = np.roll(low, 1) - low
+        up = high - Indicators.shift(high)
+        down = Indicators.shift(low) - low
         plus_dm = np.where((up > down) & (up > 0), up, 0)
         minus_dm = np.where((down > up) & (down > 0), down, 0)
         
@@ -67,6 +73,10 @@ class Indicators:
         alpha = 2 / (period + 1)
         return pd.Series(data).ewm(alpha=alpha, adjust=False).mean().values
 
+    @staticmethod
+    def shift(data: np.array, periods: int = 1) -> np.array:
+        return pd.Series(data, dtype=np.float64).shift(periods).values
+
     @staticmethod
     def sma(data: np.array, period: int) -> np.array:
         return pd.Series(data).rolling(window=period).mean().values
@@ -87,4 +97,10 @@ class IndicatorWrapper(PythonIndicator):
             return False
         result = self.indicator_func(np.array(self.Values), *self.args, **self.kwargs)
         self.Current.Value = result[-1] if isinstance(result, np.ndarray) else result
-        return True
\ No newline at end of file
+        return True
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {'values': np.array(self.Values, dtype=np.float64)}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        self.Values = state['values'].tolist()
\ No newline at end of file
@@ -0,0 +1,117 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+from typing import Dict, Tuple
+
+FEATURE_DTYPES = {'float64': np.float64, 'float32': np.float32}
+
+
+def feature_dtype(precision: str) -> type:
+    if precision not in FEATURE_DTYPES:
+        raise ValueError(f"unknown feature precision {precision!r}, expected one of {tuple(FEATURE_DTYPES)}")
+    return FEATURE_DTYPES[precision]
+
+
+def lorentzian_distances(features: np.ndarray, query: np.ndarray) -> np.ndarray:
+    # Distance from query to every row, computed in the rows' dtype
+    query = np.asarray(query, dtype=features.dtype)
+    return np.log1p(np.abs(features - query)).sum(axis=1)
+
+
+def lorentzian_predict(features: np.ndarray, labels: np.ndarray, query: np.ndarray, n_neighbors: int) -> int:
+    # Sum of the labels of the n_neighbors nearest rows
+    if len(labels) == 0:
+        return 0
+    distances = lorentzian_distances(features, query)
+    k = min(n_neighbors, len(labels))
+    nearest = np.argpartition(distances, k - 1)[:k]
+    return int(labels[nearest].sum(dtype=np.int64))
+
+
+class KNNMemorySnapshot:
+    # Read-only copy of the memory's rows, safe to query while the memory is updated
+    __slots__ = ('features', 'labels', 'version')
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray, version: int = 0):
+        features.flags.writeable = False
+        labels.flags.writeable = False
+        self.features = features
+        self.labels = labels
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        return lorentzian_distances(self.features, query)
+
+    def predict(self, query: np.ndarray, n_neighbors: int) -> int:
+        return lorentzian_predict(self.features, self.labels, query, n_neighbors)
+
+
+class KNNTrainingMemory:
+    # Fixed-size ring buffer of (feature vector, label) pairs the KNN searches over
+    def __init__(self, n_features: int, capacity: int = 2000, dtype: type = np.float64):
+        self.n_features = n_features
+        self.capacity = capacity
+        self.features = np.zeros((capacity, n_features), dtype=dtype)
+        self.labels = np.zeros(capacity, dtype=np.int8)
+        self.count = 0
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, features: np.ndarray, label: int):
+        self.features[self.cursor] = features
+        self.labels[self.cursor] = label
+        self.cursor = (self.cursor + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def append_batch(self, features: np.ndarray, labels: np.ndarray):
+        # Older rows than the capacity would be overwritten anyway
+        features = features[-self.capacity:]
+        labels = labels[-self.capacity:]
+        size = len(labels)
+        if size == 0:
+            return
+        index = (self.cursor + np.arange(size)) % self.capacity
+        self.features[index] = features
+        self.labels[index] = labels
+        self.cursor = (self.cursor + size) % self.capacity
+        self.count = min(self.count + size, self.capacity)
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Oldest first
+        if self.count < self.capacity:
+            return self.features[:self.count], self.labels[:self.count]
+        index = (self.cursor + np.arange(self.capacity)) % self.capacity
+        return self.features[index], self.labels[index]
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        # Lorentzian distance to every stored row, computed in the memory's dtype
+        return lorentzian_distances(self.features[:self.count], query)
+
+    def predict(self, query: np.ndarray, n_neighbors: int) -> int:
+        return lorentzian_predict(self.features[:self.count], self.labels[:self.count], query, n_neighbors)
+
+    def snapshot(self, version: int = 0) -> KNNMemorySnapshot:
+        # Rows keep their buffer order, so a snapshot predicts exactly like the memory it was taken from
+        return KNNMemorySnapshot(self.features[:self.count].copy(), self.labels[:self.count].copy(), version)
+
+    def clear(self):
+        self.count = 0
+        self.cursor = 0
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        features, labels = self.ordered()
+        return {'features': features, 'labels': labels}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        self.clear()
+        features = state['features']
+        if features.ndim == 2 and features.shape[1] != self.n_features:
+            # Saved with a different feature set, the memory has to be rebuilt from history
+            return
+        self.append_batch(features, state['labels'])
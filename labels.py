@@ -0,0 +1,119 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+from checkpoint import symbol_key
+from knn_memory import KNNTrainingMemory
+
+LABEL_SHORT = -1
+LABEL_NEUTRAL = 0
+LABEL_LONG = 1
+
+
+def build_labels(close: np.ndarray, horizon: int) -> np.ndarray:
+    # Direction of price `horizon` bars ahead, for (bars,) or (symbols, bars) closes.
+    # Column i labels bar i, so the last `horizon` bars are not labelled yet.
+    return np.sign(close[..., horizon:] - close[..., :-horizon]).astype(np.int8)
+
+
+class LabelStage:
+    def __init__(self, algorithm: QCAlgorithm, memory: KNNTrainingMemory, horizon: int = 4):
+        if horizon < 1:
+            raise ValueError(f"label horizon must be at least one bar, got {horizon}")
+        self.algorithm = algorithm
+        self.memory = memory
+        self.horizon = horizon
+        # Bars whose label is not known yet: (features, close), oldest first
+        self.queues: Dict[Symbol, Deque[Tuple[np.ndarray, float]]] = {}
+
+    def update(self, symbol: Symbol, features: np.ndarray, close: float) -> int:
+        # Returns how many labels were written into the memory
+        queue = self.queues.get(symbol)
+        if queue is None:
+            queue = self.queues[symbol] = deque()
+        queue.append((np.array(features, dtype=self.memory.features.dtype), float(close)))
+
+        written = 0
+        while len(queue) > self.horizon:
+            past_features, past_close = queue.popleft()
+            if np.isnan(past_features).any() or np.isnan(past_close) or np.isnan(close):
+                continue
+            self.memory.append(past_features, np.sign(close - past_close))
+            written += 1
+        return written
+
+    def set_horizon(self, horizon: int) -> int:
+        # Queued bars already `horizon` or more bars old are labelled now against the
+        # close exactly `horizon` bars after them, which is still in the queue.
+        # A longer horizon just lets the queues fill up. Returns the labels written.
+        if horizon < 1:
+            raise ValueError(f"label horizon must be at least one bar, got {horizon}")
+        self.horizon = horizon
+        written = 0
+        for symbol, queue in self.queues.items():
+            surplus = len(queue) - horizon
+            if surplus <= 0:
+                continue
+            entries = list(queue)
+            for index in range(surplus):
+                past_features, past_close = entries[index]
+                close = entries[index + horizon][1]
+                if np.isnan(past_features).any() or np.isnan(past_close) or np.isnan(close):
+                    continue
+                self.memory.append(past_features, np.sign(close - past_close))
+                written += 1
+            self.queues[symbol] = deque(entries[surplus:])
+        return written
+
+    def load_history(self, symbols: List[Symbol], features: np.ndarray, close: np.ndarray):
+        # features is (symbols, bars, n_features) and close is (symbols, bars)
+        labels = build_labels(close, self.horizon)
+        labelled = features[:, :-self.horizon]
+
+        # Bar-major order, the same order streaming updates would have produced
+        rows = labelled.transpose(1, 0, 2).reshape(-1, features.shape[2])
+        row_labels = labels.T.reshape(-1)
+        valid = ~np.isnan(rows).any(axis=1)
+        self.memory.append_batch(rows[valid], row_labels[valid])
+
+        for row, symbol in enumerate(symbols):
+            self.queues[symbol] = deque(zip(features[row, -self.horizon:], close[row, -self.horizon:].astype(float)))
+
+    def remove(self, symbol: Symbol):
+        self.queues.pop(symbol, None)
+
+    def clear(self):
+        # Drops pending rows and the memory, e.g. when the feature scaling changed
+        self.queues.clear()
+        self.memory.clear()
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        symbols = list(self.queues.keys())
+        features = np.full((len(symbols), self.horizon, self.memory.n_features), np.nan, dtype=self.memory.features.dtype)
+        close = np.full((len(symbols), self.horizon), np.nan)
+        lengths = np.zeros(len(symbols), dtype=np.int64)
+        for row, symbol in enumerate(symbols):
+            queue = list(self.queues[symbol])[-self.horizon:]
+            lengths[row] = len(queue)
+            for column, (vector, price) in enumerate(queue):
+                features[row, column] = vector
+                close[row, column] = price
+        return {
+            'keys': np.array([symbol_key(symbol) for symbol in symbols], dtype=np.str_),
+            'features': features,
+            'close': close,
+            'lengths': lengths
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        if state['features'].shape[2] != self.memory.n_features:
+            return
+        symbols = {symbol_key(symbol): symbol for symbol in self.algorithm.Securities.Keys}
+        for row, key in enumerate(state['keys']):
+            symbol = symbols.get(str(key))
+            if symbol is None:
+                continue
+            length = int(state['lengths'][row])
+            self.queues[symbol] = deque(zip(state['features'][row, :length], state['close'][row, :length].astype(float)))
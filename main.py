@@ -1,15 +1,16 @@
 from AlgorithmImports import *
-from data.data_loader import DataLoader
-from features.engineer import FeatureEngineer
-from ml_model.lorentzian_knn import LorentzianKNN, MLModelWrapper
-from kernels.regression import NadarayaWatsonRationalQuadratic, KernelRegressionIndicator
-from signals.generator import SignalGenerator
-from trade_management.executor import TradeManager
-from risk_management.lorentzian_risk_manager import LorentzianAdaptiveRiskManager
 from utils.helpers import initialize_logging
+from Config import LorentzianConfig
+from components import ComponentRegistry
+from symbol_registry import SlotMap
+from knn_memory import feature_dtype
+import importlib
 import sys
 import os
 
+# Bars of history the Lorentzian features need before the first bar they describe
+FEATURE_LOOKBACK_BARS = 100
+
 # Add project root to the Python path
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
@@ -23,45 +24,40 @@ class LorentzianClassificationAlgorithm(QCAlgorithm):
         # Initialize logging
         self.Logger = initialize_logging(self)
 
+        self.config = LorentzianConfig()
+
         # Universe Selection
         self.symbols = ["SPY", "AAPL", "GOOGL", "MSFT", "AMZN"]
         self.UniverseSettings.Resolution = Resolution.Minute
         self.SetUniverseSelection(ManualUniverseSelectionModel(self.symbols))
 
-        # Data Management
-        self.data_loader = DataLoader(self, self.symbols, self.UniverseSettings.Resolution)
-
-        # Feature Engineering
-        self.feature_engineer = FeatureEngineer(self)
-
-        # ML Model
-        self.ml_model = MLModelWrapper(
-            LorentzianKNN(n_neighbors=5, weights='distance', lorentzian_distance=True),
-            self.feature_engineer
-        )
-
-        # Kernel Regression
-        self.kernel_regression = {}
-        for symbol in self.symbols:
-            symbol_obj = self.AddEquity(symbol, self.UniverseSettings.Resolution).Symbol
-            kr_indicator = self.RegisterIndicator(
-                symbol_obj,
-                KernelRegressionIndicator(
-                    NadarayaWatsonRationalQuadratic(lookback_window=20, relative_weighting=0.5),
-                    self.UniverseSettings.Resolution
-                ),
-                self.UniverseSettings.Resolution
-            )
-            self.kernel_regression[symbol_obj] = kr_indicator
+        # Components are imported and built on demand, disabled ones never are
+        self.components = ComponentRegistry(self, self.config)
+        self.register_components()
+        self.components.build_all()
 
-        # Signal Generation
-        self.signal_generator = SignalGenerator(self.ml_model, self.kernel_regression)
-
-        # Trade Execution
-        self.trade_manager = TradeManager(self)
+        self.symbol_registry = self.components.get("symbol_registry")
+        self.data_loader = self.components.get("data_loader")
+        self.feature_engineer = self.components.get("feature_engineer")
+        self.ml_model = self.components.get("ml_model")
+        self.normalizer = self.components.get("normalizer")
+        self.label_stage = self.components.get("label_stage")
+        self.trainer = self.components.get("trainer")
+        self.knn_predictions: Dict[Symbol, int] = {}
+        # Exits that fell due while the algorithm was down, see replay_training_since
+        self.pending_exits: List[Symbol] = []
+        kernel_regression = self.components.get("kernel_regression")
+        self.kernel_regression = kernel_regression if kernel_regression is not None else {}
+        self.signal_generator = self.components.get("signal_generator")
+        self.trade_manager = self.components.get("trade_manager")
+        self.exit_scheduler = self.components.get("exit_scheduler")
+        self.risk_manager = self.components.get("risk_manager")
+        self.checkpointer = self.components.get("checkpointer")
+        self.config_reloader = self.components.get("config_reloader")
+        self.memory_profiler = self.components.get("memory_profiler")
 
         # Risk Management
-        self.SetRiskManagement(LorentzianAdaptiveRiskManager(self))
+        self.SetRiskManagement(self.risk_manager)
 
         # Execution
         self.SetExecution(ImmediateExecutionModel())
@@ -69,8 +65,229 @@ class LorentzianClassificationAlgorithm(QCAlgorithm):
         # Portfolio Construction
         self.SetPortfolioConstruction(EqualWeightingPortfolioConstructionModel())
 
-        # Warm-up period
-        self.SetWarmUp(TimeSpan.FromDays(100))
+        # Checkpointing - a restored snapshot replaces the full warm-up
+        restored_at = None
+        if self.checkpointer is not None:
+            with self.components.measure("checkpoint_restore"):
+                restored_at = self.checkpointer.restore(not_after=self.Time)
+        if restored_at is None:
+            # Warm-up period
+            self.SetWarmUp(TimeSpan.FromDays(100))
+            with self.components.measure("label_history"):
+                self.seed_training_memory()
+            if self.config.validate_precision and self.config.feature_precision != "float64":
+                with self.components.measure("precision_check"):
+                    self.validate_feature_precision()
+        else:
+            with self.components.measure("checkpoint_replay"):
+                self.replay_since(restored_at)
+        # The memory was filled outside the trainer, queries start from this snapshot
+        self.trainer.publish()
+
+        self.Logger.Info(self.components.timing_report())
+
+    def create_config_reloader(self, module):
+        from normalization import NORMALIZATION_MODES
+        reloader = module.ConfigReloader(self, self.config, self.config.hot_reload_file, self.config.hot_reload_interval_bars)
+        # Each handler touches only the state derived from its parameters
+        reloader.bind(["kernel_lookback", "kernel_relative_weighting", "kernel_regression_level"], self.reload_kernels)
+        # yhat2 uses lookback - lag as its bandwidth, which must stay positive
+        reloader.validate("kernel_lookback", lambda lookback: all(
+            lookback > kr_indicator.nw.lag for kr_indicator in self.kernel_regression.values()) and lookback > 0)
+        reloader.validate("kernel_relative_weighting", lambda weighting: weighting > 0)
+        reloader.validate("kernel_regression_level", lambda level: level >= 1)
+        reloader.bind(["show_kernel_estimate"], self.reload_kernel_plots)
+        reloader.bind(["n_neighbors"], self.reload_knn_query)
+        reloader.validate("n_neighbors", lambda neighbors: neighbors >= 1)
+        reloader.bind(["max_position_size"], self.reload_sizing)
+        reloader.validate("max_position_size", lambda size: size > 0)
+        reloader.bind(["fixed_exit_bars"], self.reload_label_horizon)
+        reloader.bind(["max_open_trades"], lambda: setattr(self.exit_scheduler, 'max_open_trades', self.config.max_open_trades))
+        reloader.validate("max_open_trades", lambda trades: trades >= 1)
+        reloader.bind(["feature_normalization", "normalization_window"], self.reload_normalization)
+        reloader.validate("feature_normalization", lambda mode: mode in NORMALIZATION_MODES)
+        reloader.validate("normalization_window", lambda window: window >= 1)
+        reloader.bind(["checkpoint_interval_bars"], self.reload_checkpointing)
+        reloader.bind(["hot_reload_interval_bars"], lambda: setattr(reloader, 'interval_bars', self.config.hot_reload_interval_bars))
+        reloader.watch(["use_dynamic_exits", "memory_assert_bounded"])
+        return reloader
+
+    def reload_kernels(self):
+        for kr_indicator in self.kernel_regression.values():
+            kr_indicator.nw.reconfigure(
+                lookback_window=self.config.kernel_lookback,
+                relative_weighting=self.config.kernel_relative_weighting,
+                start_bar=self.config.kernel_regression_level
+            )
+
+    def reload_kernel_plots(self):
+        for kr_indicator in self.kernel_regression.values():
+            kr_indicator.show_estimate = self.config.show_kernel_estimate
+
+    def reload_knn_query(self):
+        self.components.get("knn").n_neighbors = self.config.n_neighbors
+
+    def reload_sizing(self):
+        self.trade_manager.risk_manager.max_position_size = self.config.max_position_size
+
+    def reload_label_horizon(self):
+        # Pending bars are labelled against the new horizon, the ones it already
+        # covers right away from the closes still queued
+        self.trainer.flush()
+        self.label_stage.set_horizon(max(self.config.fixed_exit_bars, 1))
+        self.trainer.publish()
+
+    def reload_normalization(self):
+        # Rows scaled the old way would be compared against new ones, so the KNN
+        # memory and the pending rows are rebuilt from history with the new scaling
+        self.trainer.flush()
+        self.normalizer.reconfigure(window=self.config.normalization_window, mode=self.config.feature_normalization)
+        self.label_stage.clear()
+        self.seed_training_memory()
+        self.trainer.publish()
+
+    def reload_checkpointing(self):
+        if self.checkpointer is not None:
+            self.checkpointer.interval_bars = self.config.checkpoint_interval_bars
+
+    def register_components(self):
+        config = self.config
+        resolution = self.UniverseSettings.Resolution
+        dtype = feature_dtype(config.feature_precision)
+        registry = self.components
+
+        registry.register(
+            "symbol_registry", "symbol_registry",
+            lambda module, components: module.SymbolRegistry(max(len(self.symbols), 1))
+        )
+        registry.register(
+            "data_loader", "data.data_loader",
+            lambda module, components: module.DataLoader(self, self.symbols, resolution, components.get("symbol_registry"))
+        )
+        registry.register(
+            "feature_engineer", "features.engineer",
+            lambda module, components: module.FeatureEngineer(self, dtype)
+        )
+        registry.register(
+            "knn", "ml_model.lorentzian_knn",
+            lambda module, components: module.LorentzianKNN(
+                n_neighbors=config.n_neighbors, weights='distance', lorentzian_distance=True
+            )
+        )
+        registry.register(
+            "normalizer", "normalization",
+            lambda module, components: module.FeatureNormalizer(
+                self, len(config.feature_list), config.normalization_window, config.feature_normalization, dtype
+            )
+        )
+        registry.register(
+            "knn_memory", "knn_memory",
+            lambda module, components: module.KNNTrainingMemory(len(config.feature_list), config.knn_memory_size, dtype)
+        )
+        registry.register(
+            "label_stage", "labels",
+            lambda module, components: module.LabelStage(self, components.get("knn_memory"), config.fixed_exit_bars)
+        )
+        registry.register(
+            "trainer", "training_worker",
+            lambda module, components: module.BackgroundTrainer(
+                components.get("label_stage"), background=config.knn_background_training
+            )
+        )
+        registry.register(
+            "ml_model", "ml_model.lorentzian_knn",
+            lambda module, components: module.MLModelWrapper(
+                components.get("knn"), components.get("feature_engineer")
+            )
+        )
+        registry.register(
+            "kernel_outputs", "kernels.regression",
+            lambda module, components: module.KernelOutputStore(
+                components.get("symbol_registry"), members=2 + len(config.kernel_variants)
+            ),
+            enabled=lambda c: c.use_kernel_filter
+        )
+        registry.register(
+            "kernel_regression", "kernels.regression",
+            lambda module, components: self.create_kernel_indicators(module, components),
+            enabled=lambda c: c.use_kernel_filter
+        )
+        registry.register(
+            "exit_scheduler", "exit_scheduler",
+            lambda module, components: module.ExitScheduler(self, config.exit_wheel_size, config.max_open_trades)
+        )
+        registry.register(
+            "signal_generator", "signals.generator",
+            lambda module, components: module.SignalGenerator(
+                components.get("ml_model"), components.get("kernel_regression") or {},
+                registry=components.get("symbol_registry")
+            )
+        )
+        registry.register(
+            "trade_manager", "trade_management.executor",
+            lambda module, components: module.TradeManager(self, config.max_position_size)
+        )
+        registry.register(
+            "risk_manager", "risk_management.lorentzian_risk_manager",
+            lambda module, components: module.LorentzianAdaptiveRiskManager(
+                self, registry=components.get("symbol_registry"), kernel_outputs=components.get("kernel_outputs")
+            )
+        )
+        registry.register(
+            "checkpointer", "checkpoint",
+            lambda module, components: self.create_checkpointer(module, components),
+            # The ObjectStore outlives a backtest, so only live runs save and restore
+            enabled=lambda c: c.checkpoint_interval_bars > 0 and self.LiveMode
+        )
+        registry.register(
+            "config_reloader", "hot_reload",
+            lambda module, components: self.create_config_reloader(module),
+            enabled=lambda c: c.hot_reload_interval_bars > 0
+        )
+        registry.register(
+            "memory_profiler", "memory_profiler",
+            lambda module, components: module.MemoryProfiler(
+                self, components,
+                interval_bars=config.memory_profile_interval_bars,
+                growth_tolerance=config.memory_growth_tolerance,
+                trace_allocations=config.memory_trace_allocations
+            ),
+            enabled=lambda c: c.memory_profile_interval_bars > 0
+        )
+
+    def create_kernel_indicators(self, module, components: ComponentRegistry) -> SlotMap:
+        kernel_regression = SlotMap(components.get("symbol_registry"))
+        for symbol in components.get("data_loader").symbols:
+            kernel_regression[symbol] = self.create_kernel_indicator(module, symbol)
+        return kernel_regression
+
+    def create_kernel_indicator(self, module, symbol: Symbol):
+        kr_indicator = module.KernelRegressionIndicator(
+            self,
+            symbol,
+            module.NadarayaWatsonRationalQuadratic(
+                self,
+                lookback_window=self.config.kernel_lookback,
+                relative_weighting=self.config.kernel_relative_weighting,
+                start_bar=self.config.kernel_regression_level,
+                variants=[tuple(variant) for variant in self.config.kernel_variants]
+            ),
+            show_estimate=self.config.show_kernel_estimate,
+            output_store=self.components.get("kernel_outputs")
+        )
+        self.RegisterIndicator(symbol, kr_indicator, self.UniverseSettings.Resolution)
+        return kr_indicator
+
+    def create_checkpointer(self, module, components: ComponentRegistry):
+        checkpointer = module.StateCheckpointer(self, self.config.checkpoint_key, self.config.checkpoint_interval_bars)
+        if components.is_enabled("kernel_regression"):
+            checkpointer.register_symbols("kernel_regression", components.get("kernel_regression"))
+        checkpointer.register("risk_manager", components.get("risk_manager"))
+        checkpointer.register("normalizer", components.get("normalizer"))
+        checkpointer.register("knn_memory", components.get("knn_memory"))
+        checkpointer.register("exit_scheduler", components.get("exit_scheduler"))
+        checkpointer.register("label_stage", components.get("label_stage"))
+        return checkpointer
 
     def OnData(self, data: Slice):
         if self.IsWarmingUp:
@@ -78,24 +295,119 @@ class LorentzianClassificationAlgorithm(QCAlgorithm):
 
         # Update data and features
         try:
+            # Picks up the snapshot the worker built from the previous bar
+            self.trainer.begin_bar()
+
+            if self.config_reloader is not None:
+                self.config_reloader.poll()
+
+            self.process_exits()
+
             self.data_loader.update(data)
             features = self.feature_engineer.create_features(self.data_loader.current_data)
 
-            # Update ML model
-            self.ml_model.update(features)
+            # Predict from the KNN memory, then label bars whose horizon has passed into it
+            self.update_training_labels(features)
 
-            # Generate signals
-            signals = self.signal_generator.generate_signals(self.data_loader.current_data)
+            # Generate signals from this bar's predictions
+            signals = self.signal_generator.generate_signals(self.knn_predictions)
 
-            # Execute trades based on signals
+            # Execute trades based on signals, each entry is registered for its bar-count exit
             for symbol, signal in signals.items():
                 if signal != 0:  # 0 represents no action
-                    self.trade_manager.execute_trade(symbol, signal)
+                    if self.exit_scheduler.schedule(symbol, self.config.fixed_exit_bars, signal):
+                        self.trade_manager.execute_trade(symbol, signal)
 
             # Log current state
             self.log_current_state(signals)
         except Exception as e:
             self.Logger.Error(f"Error in OnData: {str(e)}")
+        finally:
+            # Also after a failed bar, so the rows it submitted reach the memory on time
+            self.end_bar()
+
+    def end_bar(self):
+        try:
+            if self.checkpointer is not None:
+                self.checkpointer.on_bar(self.Time)
+
+            if self.memory_profiler is not None:
+                self.memory_profiler.on_bar()
+        except Exception as e:
+            self.Logger.Error(f"Error at end of bar: {str(e)}")
+        finally:
+            # Last: the worker owns the label stage and KNN memory until the next begin_bar
+            self.trainer.end_bar()
+
+    def process_exits(self):
+        expired, self.pending_exits = self.pending_exits + self.exit_scheduler.advance(), []
+        for symbol in expired:
+            self.Liquidate(symbol)
+
+        # Only symbols whose kernel raised an alert are looked at, not every open position
+        kernel_outputs = self.components.get("kernel_outputs")
+        if self.config.use_dynamic_exits and kernel_outputs is not None:
+            for symbol, turned in kernel_outputs.turning():
+                if self.exit_scheduler.on_kernel_turn(symbol, turned):
+                    self.Liquidate(symbol)
+
+    def history_panel(self, periods: int, dtype: type = None):
+        # (symbols, raw features (symbols, bars, n_features), close (symbols, bars)) aligned on the shortest history
+        symbols = self.data_loader.symbols
+        history = self.History(symbols, periods, self.UniverseSettings.Resolution)
+        if history.empty:
+            return None
+
+        frames = {symbol: history.loc[symbol] for symbol in symbols if symbol in history.index.get_level_values(0)}
+        if not frames:
+            return None
+        bars = min(len(df) for df in frames.values())
+        features = np.stack([
+            self.feature_engineer.feature_matrix(df.iloc[-bars:], self.config.feature_list, dtype) for df in frames.values()
+        ])
+        close = np.stack([df['close'].values[-bars:] for df in frames.values()]).astype(np.float64)
+        return list(frames.keys()), features, close
+
+    def seed_training_memory(self):
+        # Batch-label the history once instead of streaming it through OnData
+        panel = self.history_panel(self.config.knn_memory_size + self.config.fixed_exit_bars)
+        if panel is None:
+            return
+        symbols, features, close = panel
+        features = self.normalizer.load_history(symbols, features)
+        self.label_stage.load_history(symbols, features, close)
+
+    def validate_feature_precision(self):
+        # Imported here so the replay machinery only loads when the check is enabled
+        from precision import validate_precision, format_precision_report
+        # Raw features in float64, each path rounds them to its own precision
+        panel = self.history_panel(self.config.knn_memory_size + self.config.fixed_exit_bars, np.float64)
+        if panel is None:
+            return
+        symbols, features, close = panel
+        results = validate_precision(
+            self, symbols, features, close,
+            horizon=max(self.config.fixed_exit_bars, 1), capacity=self.config.knn_memory_size,
+            n_neighbors=self.config.n_neighbors, window=self.config.normalization_window,
+            mode=self.config.feature_normalization, precision=self.config.feature_precision
+        )
+        self.Logger.Info(format_precision_report(self.config.feature_precision, results))
+
+    def update_training_labels(self, features: Dict[Symbol, pd.DataFrame]):
+        vectors = {}
+        for symbol, df in features.items():
+            if df.empty:
+                continue
+            vector = self.feature_engineer.feature_matrix(df, self.config.feature_list)[-1]
+            vectors[symbol] = (self.normalizer.update(symbol, vector), df['close'].iloc[-1])
+
+        # Every symbol is queried before any of this bar's rows reach the memory
+        self.knn_predictions = {
+            symbol: self.trainer.predict(vector, self.config.n_neighbors)
+            for symbol, (vector, _) in vectors.items() if not np.isnan(vector).any()
+        }
+        for symbol, (vector, close) in vectors.items():
+            self.trainer.submit(symbol, vector, close)
 
     def OnOrderEvent(self, orderEvent):
         if orderEvent.Status == OrderStatus.Filled:
@@ -104,21 +416,81 @@ class LorentzianClassificationAlgorithm(QCAlgorithm):
     def OnSecuritiesChanged(self, changes):
         for removed in changes.RemovedSecurities:
             symbol = removed.Symbol
+            self.normalizer.remove(symbol)
+            self.exit_scheduler.cancel(symbol)
+            self.trainer.remove(symbol)
+            self.data_loader.remove_symbol(symbol)
             if symbol in self.kernel_regression:
-                self.kernel_regression.pop(symbol)
+                kr_indicator = self.kernel_regression.pop(symbol)
+                kr_indicator.output.store.release(kr_indicator.output)
+            # Slot-indexed rows are reset while the slot still maps to the symbol
+            self.signal_generator.remove_symbol(symbol)
+            self.risk_manager.remove_symbol(symbol)
+            # Last, once every component has let go of the slot
+            self.symbol_registry.remove(symbol)
 
+        for added in changes.AddedSecurities:
+            self.data_loader.add_symbol(added.Symbol)
+
+        if not self.components.is_enabled("kernel_regression"):
+            return
+        kernels = importlib.import_module("kernels.regression")
         for added in changes.AddedSecurities:
             symbol = added.Symbol
             if symbol not in self.kernel_regression:
-                kr_indicator = self.RegisterIndicator(
-                    symbol,
-                    KernelRegressionIndicator(
-                        NadarayaWatsonRationalQuadratic(lookback_window=20, relative_weighting=0.5),
-                        self.UniverseSettings.Resolution
-                    ),
-                    self.UniverseSettings.Resolution
-                )
-                self.kernel_regression[symbol] = kr_indicator
+                self.kernel_regression[symbol] = self.create_kernel_indicator(kernels, symbol)
+
+    def OnEndOfAlgorithm(self):
+        self.trainer.close()
+        if self.checkpointer is not None:
+            self.checkpointer.save(self.Time)
+
+        if self.memory_profiler is not None:
+            self.Logger.Info(self.memory_profiler.report())
+            if self.config.memory_assert_bounded:
+                self.memory_profiler.assert_bounded()
+
+    def replay_since(self, since: datetime):
+        # Only the bars after the snapshot have to be pushed through the indicators
+        for symbol, kr_indicator in self.kernel_regression.items():
+            history = self.History[TradeBar](symbol, since, self.Time, self.UniverseSettings.Resolution)
+            for bar in history:
+                if bar.EndTime > since:
+                    kr_indicator.Update(bar)
+        self.replay_training_since(since)
+
+    def replay_training_since(self, since: datetime):
+        # The normalizer, label stage and exit timers also missed the gap: replay it
+        # bar-major, in the order OnData would have seen it
+        resolution = self.UniverseSettings.Resolution
+        symbols = self.data_loader.symbols
+        gap = self.History(symbols, since, self.Time, resolution)
+        if gap.empty:
+            return
+        times = gap.index.get_level_values(-1)
+        gap = gap[times > since]
+        bar_times = np.unique(gap.index.get_level_values(-1))
+
+        # Features need a lookback before the first replayed bar
+        history = self.History(symbols, len(bar_times) + FEATURE_LOOKBACK_BARS, resolution)
+        rows: Dict[Symbol, Dict[Any, Tuple[np.ndarray, float]]] = {}
+        for symbol in symbols:
+            if symbol not in history.index.get_level_values(0):
+                continue
+            df = history.loc[symbol]
+            matrix = self.feature_engineer.feature_matrix(df, self.config.feature_list)
+            rows[symbol] = {time: (matrix[row], float(df['close'].iloc[row]))
+                            for row, time in enumerate(df.index) if time > since}
+
+        for time in bar_times:
+            # Timers that ran out during the gap are closed on the first live bar
+            self.pending_exits.extend(self.exit_scheduler.advance())
+            for symbol, by_time in rows.items():
+                row = by_time.get(time)
+                if row is None:
+                    continue
+                vector, close = row
+                self.label_stage.update(symbol, self.normalizer.update(symbol, vector), close)
 
     def log_current_state(self, signals):
         self.Logger.Info("--- Current State ---")
@@ -0,0 +1,158 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import gc
+import sys
+import tracemalloc
+import types
+import numpy as np
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Never walked into: they are shared by everything and would attribute the
+# whole process to whichever component reaches them first
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, types.CodeType, types.FrameType)
+
+
+def retained_size(root: Any, stop: Set[int]) -> int:
+    # Bytes reachable from root, not counting objects whose id is in stop.
+    # Owning numpy arrays report their buffer through sys.getsizeof; views
+    # reach their base through gc.get_referents.
+    seen: Set[int] = set(stop)
+    pending = [root]
+    total = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        pending.extend(gc.get_referents(obj))
+    return total
+
+
+class MemoryProfiler:
+    # Opt-in: samples every component's retained size every `interval_bars` bars
+    # and, with trace_allocations, the live allocations made from each
+    # component's module. A component is flagged as growing when its retained
+    # size still rises over the second half of the samples, i.e. after warm-up
+    # buffers have filled.
+    def __init__(self, algorithm: QCAlgorithm, components, interval_bars: int = 500,
+                 growth_tolerance: float = 0.1, min_growth_bytes: int = 1 << 16,
+                 trace_allocations: bool = False):
+        self.algorithm = algorithm
+        self.components = components
+        self.interval_bars = interval_bars
+        self.growth_tolerance = growth_tolerance
+        self.min_growth_bytes = min_growth_bytes
+        self.trace_allocations = trace_allocations
+        self.bar = 0
+        # name -> [(bar, retained bytes)]
+        self.samples: Dict[str, List[Tuple[int, int]]] = {}
+        # name -> live traced bytes at the last sample
+        self.allocated: Dict[str, int] = {}
+        self.symbol_counts: List[int] = []
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def on_bar(self):
+        self.bar += 1
+        if self.interval_bars > 0 and self.bar % self.interval_bars == 0:
+            self.sample()
+
+    def _instances(self) -> Dict[str, Any]:
+        return {name: instance for name, instance in self.components.instances.items()
+                if instance is not None and instance is not self}
+
+    def sample(self):
+        instances = self._instances()
+        # Each component stops at the algorithm and at every other component,
+        # so a shared dependency is charged to the component that owns it
+        shared = {id(self.algorithm), id(self)} | {id(instance) for instance in instances.values()}
+        for name, instance in instances.items():
+            size = retained_size(instance, shared - {id(instance)})
+            self.samples.setdefault(name, []).append((self.bar, size))
+
+        registry = self.components.instances.get("symbol_registry")
+        self.symbol_counts.append(len(registry) if registry is not None else 0)
+
+        if self.trace_allocations and tracemalloc.is_tracing():
+            self.allocated = self._traced_allocations(instances)
+
+    def _traced_allocations(self, instances: Dict[str, Any]) -> Dict[str, int]:
+        # Components defined in the same module share their module's allocations
+        by_file: Dict[str, int] = {}
+        for stat in tracemalloc.take_snapshot().statistics('filename'):
+            by_file[stat.traceback[0].filename] = stat.size
+        allocated = {}
+        for name, instance in instances.items():
+            filename = self._module_file(instance)
+            if filename is not None:
+                allocated[name] = by_file.get(filename, 0)
+        return allocated
+
+    @staticmethod
+    def _module_file(instance: Any) -> Optional[str]:
+        # Containers of components (e.g. the per-symbol kernel indicators) are
+        # attributed to the module of their values
+        if hasattr(instance, 'values') and callable(instance.values) and not isinstance(instance, np.ndarray):
+            for value in instance.values():
+                instance = value
+                break
+        module = sys.modules.get(type(instance).__module__)
+        return getattr(module, '__file__', None)
+
+    def growth(self, name: str) -> float:
+        # Fitted bytes gained over the second half of the samples
+        samples = self.samples.get(name, [])
+        tail = samples[len(samples) // 2:]
+        if len(tail) < 2:
+            return 0.0
+        bars = np.array([bar for bar, _ in tail], dtype=np.float64)
+        sizes = np.array([size for _, size in tail], dtype=np.float64)
+        slope = np.polyfit(bars, sizes, 1)[0]
+        return float(slope * (bars[-1] - bars[0]))
+
+    def growing(self) -> List[str]:
+        flagged = []
+        for name, samples in self.samples.items():
+            if len(samples) < 4:
+                continue
+            growth = self.growth(name)
+            steady = samples[len(samples) // 2][1]
+            if growth > self.min_growth_bytes and growth > self.growth_tolerance * steady:
+                flagged.append(name)
+        return flagged
+
+    def footprint(self) -> Dict[str, Tuple[int, float]]:
+        # name -> (retained bytes, retained bytes per symbol) at the last sample
+        symbols = max(self.symbol_counts[-1], 1) if self.symbol_counts else 1
+        return {name: (samples[-1][1], samples[-1][1] / symbols)
+                for name, samples in self.samples.items() if samples}
+
+    def report(self) -> str:
+        if not self.samples:
+            self.sample()
+        growing = set(self.growing())
+        footprint = self.footprint()
+        rows = sorted(footprint.items(), key=lambda item: -item[1][0])
+        lines = [f"--- Memory Footprint (bar {self.bar}, {len(self.symbol_counts)} samples) ---"]
+        for name, (retained, per_symbol) in rows:
+            line = f"{name}: retained={retained / 1024:.1f}KB per_symbol={per_symbol / 1024:.1f}KB"
+            if name in self.allocated:
+                line += f" traced={self.allocated[name] / 1024:.1f}KB"
+            if name in growing:
+                line += f" GROWING +{self.growth(name) / 1024:.1f}KB"
+            lines.append(line)
+        lines.append(f"total: {sum(retained for retained, _ in footprint.values()) / 1024:.1f}KB")
+        return "\n".join(lines)
+
+    def assert_bounded(self, names: Optional[List[str]] = None):
+        # For tests: raises if any (or any of the given) component kept growing
+        growing = [name for name in self.growing() if names is None or name in names]
+        if growing:
+            details = ", ".join(f"{name} +{self.growth(name) / 1024:.1f}KB" for name in growing)
+            raise AssertionError(f"retained memory grows with bar count: {details}")
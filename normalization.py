@@ -0,0 +1,181 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+from checkpoint import symbol_key
+
+NORMALIZATION_MODES = ('minmax', 'zscore', 'none')
+
+
+class _SymbolNormalizationState:
+    __slots__ = ('bar', 'max_queues', 'min_queues', 'values', 'sums', 'squares', 'counts')
+
+    def __init__(self, n_features: int, window: int, dtype: type = np.float64):
+        self.bar = 0
+        # Monotonic deques of (bar, value): front is the window max/min
+        self.max_queues: List[Deque[Tuple[int, float]]] = [deque() for _ in range(n_features)]
+        self.min_queues: List[Deque[Tuple[int, float]]] = [deque() for _ in range(n_features)]
+        # Ring buffer of raw values for the running sums and for checkpointing;
+        # the sums themselves always accumulate in float64
+        self.values = np.full((window, n_features), np.nan, dtype=dtype)
+        self.sums = np.zeros(n_features)
+        self.squares = np.zeros(n_features)
+        self.counts = np.zeros(n_features, dtype=np.int64)
+
+
+class FeatureNormalizer:
+    def __init__(self, algorithm: QCAlgorithm, n_features: int, window: int = 200, mode: str = 'minmax',
+                 dtype: type = np.float64):
+        if mode not in NORMALIZATION_MODES:
+            raise ValueError(f"unknown normalization mode {mode!r}, expected one of {NORMALIZATION_MODES}")
+        self.algorithm = algorithm
+        self.n_features = n_features
+        self.window = window
+        self.mode = mode
+        self.dtype = dtype
+        self.states: Dict[Symbol, _SymbolNormalizationState] = {}
+
+    def update(self, symbol: Symbol, features: np.ndarray) -> np.ndarray:
+        # Amortized O(1) per feature: every value enters and leaves each deque once
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = _SymbolNormalizationState(self.n_features, self.window, self.dtype)
+        features = np.asarray(features, dtype=self.dtype)
+
+        bar = state.bar
+        slot = bar % self.window
+        expired = bar - self.window
+        evicted = state.values[slot]
+
+        for i in range(self.n_features):
+            value = float(features[i])
+            old = evicted[i]
+            if not np.isnan(old):
+                state.sums[i] -= old
+                state.squares[i] -= old * old
+                state.counts[i] -= 1
+
+            max_queue = state.max_queues[i]
+            min_queue = state.min_queues[i]
+            while max_queue and max_queue[0][0] <= expired:
+                max_queue.popleft()
+            while min_queue and min_queue[0][0] <= expired:
+                min_queue.popleft()
+
+            if not np.isnan(value):
+                while max_queue and max_queue[-1][1] <= value:
+                    max_queue.pop()
+                max_queue.append((bar, value))
+                while min_queue and min_queue[-1][1] >= value:
+                    min_queue.pop()
+                min_queue.append((bar, value))
+                state.sums[i] += value
+                state.squares[i] += value * value
+                state.counts[i] += 1
+
+        state.values[slot] = features
+        state.bar = bar + 1
+        if state.bar % self.window == 0:
+            # Resum once per window so add/subtract rounding cannot drift, still O(1) amortized
+            values = state.values.astype(np.float64)
+            valid = ~np.isnan(values)
+            state.sums = np.where(valid, values, 0.0).sum(axis=0)
+            state.squares = np.where(valid, values ** 2, 0.0).sum(axis=0)
+            state.counts = valid.sum(axis=0)
+        return self.transform(symbol, features)
+
+    def transform(self, symbol: Symbol, features: np.ndarray) -> np.ndarray:
+        # Scales with the symbol's current window without updating it
+        # Scaling runs in float64, the result is returned in self.dtype
+        features = np.asarray(features, dtype=np.float64)
+        if self.mode == 'none':
+            return features.astype(self.dtype, copy=False)
+        state = self.states.get(symbol)
+        if state is None:
+            return np.full(self.n_features, np.nan, dtype=self.dtype)
+
+        if self.mode == 'minmax':
+            high = np.array([q[0][1] if q else np.nan for q in state.max_queues])
+            low = np.array([q[0][1] if q else np.nan for q in state.min_queues])
+            return ((features - low) / np.maximum(high - low, 1e-10)).astype(self.dtype)
+
+        counts = np.maximum(state.counts, 1)
+        mean = state.sums / counts
+        variance = np.maximum(state.squares / counts - mean * mean, 0.0)
+        scaled = (features - mean) / np.maximum(np.sqrt(variance), 1e-10)
+        return np.where(state.counts > 0, scaled, np.nan).astype(self.dtype)
+
+    def load_history(self, symbols: List[Symbol], features: np.ndarray) -> np.ndarray:
+        # Batch mode for (symbols, bars, n_features) panels; leaves each symbol's
+        # streaming state positioned after the last bar
+        normalized = np.empty(features.shape, dtype=self.dtype)
+        for row, symbol in enumerate(symbols):
+            normalized[row] = self._normalize_history(features[row])
+            self.states.pop(symbol, None)
+            for vector in features[row, -self.window:]:
+                self.update(symbol, vector)
+        return normalized
+
+    def _normalize_history(self, features: np.ndarray) -> np.ndarray:
+        # Rounded to self.dtype first so batch and streaming see the same inputs
+        features = features.astype(self.dtype).astype(np.float64)
+        if self.mode == 'none':
+            return features
+        rolling = pd.DataFrame(features).rolling(self.window, min_periods=1)
+        if self.mode == 'minmax':
+            high = rolling.max().values
+            low = rolling.min().values
+            return (features - low) / np.maximum(high - low, 1e-10)
+        mean = rolling.mean().values
+        std = rolling.std(ddof=0).values
+        return (features - mean) / np.maximum(std, 1e-10)
+
+    def reconfigure(self, window: int = None, mode: str = None):
+        if mode is not None:
+            if mode not in NORMALIZATION_MODES:
+                raise ValueError(f"unknown normalization mode {mode!r}, expected one of {NORMALIZATION_MODES}")
+            self.mode = mode
+        if window is not None and window != self.window:
+            # Rebuild from the raw values still held, at most the old window
+            history = {symbol: self._ordered_values(state) for symbol, state in self.states.items()}
+            self.window = window
+            self.states = {}
+            for symbol, values in history.items():
+                for vector in values[-window:]:
+                    self.update(symbol, vector)
+
+    def remove(self, symbol: Symbol):
+        self.states.pop(symbol, None)
+
+    def _ordered_values(self, state: _SymbolNormalizationState) -> np.ndarray:
+        size = min(state.bar, self.window)
+        index = (state.bar - size + np.arange(size)) % self.window
+        return state.values[index]
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        symbols = list(self.states.keys())
+        windows = [self._ordered_values(self.states[symbol]) for symbol in symbols]
+        lengths = np.array([len(w) for w in windows], dtype=np.int64)
+        values = np.full((len(symbols), self.window, self.n_features), np.nan, dtype=self.dtype)
+        for row, window in enumerate(windows):
+            values[row, :len(window)] = window
+        return {
+            'keys': np.array([symbol_key(symbol) for symbol in symbols], dtype=np.str_),
+            'values': values,
+            'lengths': lengths
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        if state['values'].ndim != 3 or state['values'].shape[2] != self.n_features:
+            return
+        symbols = {symbol_key(symbol): symbol for symbol in self.algorithm.Securities.Keys}
+        for row, key in enumerate(state['keys']):
+            symbol = symbols.get(str(key))
+            if symbol is None:
+                continue
+            self.states.pop(symbol, None)
+            for vector in state['values'][row, :int(state['lengths'][row])][-self.window:]:
+                self.update(symbol, vector)
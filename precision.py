@@ -0,0 +1,60 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+from typing import Dict, List
+from knn_memory import KNNTrainingMemory, feature_dtype
+from labels import LabelStage
+from normalization import FeatureNormalizer
+
+def replay_predictions(algorithm: QCAlgorithm, symbols: List[Symbol], features: np.ndarray, close: np.ndarray,
+                       dtype: type, horizon: int, capacity: int, n_neighbors: int,
+                       window: int, mode: str) -> Dict[str, np.ndarray]:
+    # Streams a (symbols, bars, n_features) panel of raw features through the
+    # normalizer, the KNN memory and the label stage in bar-major order, the way
+    # OnData does, predicting each bar before its features are labelled
+    n_symbols, n_bars, n_features = features.shape
+    normalizer = FeatureNormalizer(algorithm, n_features, window, mode, dtype)
+    memory = KNNTrainingMemory(n_features, capacity, dtype)
+    label_stage = LabelStage(algorithm, memory, horizon)
+
+    normalized = np.full(features.shape, np.nan)
+    predictions = np.zeros((n_symbols, n_bars), dtype=np.int64)
+    for bar in range(n_bars):
+        for row, symbol in enumerate(symbols):
+            vector = normalizer.update(symbol, features[row, bar])
+            normalized[row, bar] = vector
+            if not np.isnan(vector).any():
+                predictions[row, bar] = memory.predict(vector, n_neighbors)
+            label_stage.update(symbol, vector, close[row, bar])
+    return {'features': normalized, 'predictions': predictions, 'signals': np.sign(predictions)}
+
+
+def validate_precision(algorithm: QCAlgorithm, symbols: List[Symbol], features: np.ndarray, close: np.ndarray,
+                       horizon: int = 4, capacity: int = 2000, n_neighbors: int = 8,
+                       window: int = 200, mode: str = 'minmax', precision: str = 'float32') -> Dict[str, float]:
+    # Compares the reduced precision path against float64 over the same history
+    reference = replay_predictions(algorithm, symbols, features, close, np.float64,
+                                   horizon, capacity, n_neighbors, window, mode)
+    candidate = replay_predictions(algorithm, symbols, features, close, feature_dtype(precision),
+                                   horizon, capacity, n_neighbors, window, mode)
+
+    valid = ~np.isnan(reference['features']).any(axis=2)
+    feature_error = np.abs(candidate['features'] - reference['features'])[valid]
+    prediction_error = np.abs(candidate['predictions'] - reference['predictions'])[valid]
+    signals_match = (candidate['signals'] == reference['signals'])[valid]
+    return {
+        'bars': int(valid.sum()),
+        'feature_max_abs_error': float(feature_error.max()) if feature_error.size else 0.0,
+        'prediction_max_abs_error': float(prediction_error.max()) if prediction_error.size else 0.0,
+        'prediction_mismatch_rate': float((prediction_error > 0).mean()) if prediction_error.size else 0.0,
+        'signal_agreement': float(signals_match.mean()) if signals_match.size else 1.0
+    }
+
+
+def format_precision_report(precision: str, results: Dict[str, float]) -> str:
+    return (f"--- Precision Check ({precision} vs float64, {results['bars']} bars) ---\n"
+            f"feature max abs error: {results['feature_max_abs_error']:.3g}\n"
+            f"prediction max abs error: {results['prediction_max_abs_error']:.0f}\n"
+            f"prediction mismatch rate: {results['prediction_mismatch_rate']:.2%}\n"
+            f"signal agreement: {results['signal_agreement']:.2%}")
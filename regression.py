@@ -1,84 +1,278 @@
 from AlgorithmImports import *
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from symbol_registry import SymbolRegistry, ensure_capacity
+
+# Kernel functions take the bar distance d, the bandwidth h and a kernel specific
+# third parameter r (relative weighting for rational quadratic, period for periodic)
+def rational_quadratic_kernel(d: np.ndarray, h: float, r: float) -> np.ndarray:
+    return (1 + (d ** 2 / ((h ** 2) * 2 * r))) ** -r
+
+def gaussian_kernel(d: np.ndarray, h: float, r: float) -> np.ndarray:
+    return np.exp(-(d ** 2) / (2 * h ** 2))
+
+def periodic_kernel(d: np.ndarray, h: float, r: float) -> np.ndarray:
+    return np.exp(-2 * np.sin(np.pi * d / r) ** 2 / h ** 2)
+
+def locally_periodic_kernel(d: np.ndarray, h: float, r: float) -> np.ndarray:
+    return periodic_kernel(d, h, r) * gaussian_kernel(d, h, r)
+
+KERNELS = {
+    'rational_quadratic': rational_quadratic_kernel,
+    'gaussian': gaussian_kernel,
+    'periodic': periodic_kernel,
+    'locally_periodic': locally_periodic_kernel,
+}
+
+KernelSpec = Tuple[str, float, float]
+
+# Columns after start_bar the signals read: the rate of change compares the last
+# three estimates and a crossover the last two, so the window keeps all of them valid
+SIGNAL_COLUMNS = 3
+
+class KernelBank:
+    # (kernel, h, r, window) -> read-only weights, shared by every bank and symbol
+    weight_cache: Dict[Tuple[str, float, float, int], np.ndarray] = {}
+
+    def __init__(self, members: List[KernelSpec], window: int):
+        self.members = list(members)
+        self.window = window
+        self.weights = np.vstack([self.kernel_weights(kernel, h, r, window) for kernel, h, r in self.members])
+        self.cumulative_weights = np.cumsum(self.weights, axis=1)
+
+    @classmethod
+    def kernel_weights(cls, kernel: str, h: float, r: float, window: int) -> np.ndarray:
+        key = (kernel, float(h), float(r), window)
+        weights = cls.weight_cache.get(key)
+        if weights is None:
+            weights = KERNELS[kernel](np.arange(window, dtype=np.float64), h, r)
+            weights.setflags(write=False)
+            cls.weight_cache[key] = weights
+        return weights
+
+    def index(self, kernel: str, h: float, r: float) -> int:
+        return self.members.index((kernel, h, r))
+
+    def evaluate(self, source: np.ndarray) -> np.ndarray:
+        # Row m, column i is member m's weighted mean of source[0..i]
+        size = len(source)
+        return np.cumsum(self.weights[:, :size] * source, axis=1) / self.cumulative_weights[:, :size]
+
+    def evaluate_tail(self, source: np.ndarray, count: int) -> np.ndarray:
+        # Only the last `count` columns of evaluate(), for every member
+        size = len(source)
+        weights, cumulative = self.weights, self.cumulative_weights
+        columns = [(weights[:, :k] @ source[:k]) / cumulative[:, k - 1] for k in range(max(size - count, 0) + 1, size + 1)]
+        return np.stack(columns, axis=1)
+
+    @staticmethod
+    def crossovers(estimates: np.ndarray) -> np.ndarray:
+        # [a, b] is 1 when member a crossed above member b on the last bar, -1 when it crossed below
+        if estimates.shape[1] < 2:
+            return np.zeros((len(estimates), len(estimates)), dtype=np.int8)
+        now = estimates[:, -1][:, None] - estimates[:, -1][None, :]
+        prev = estimates[:, -2][:, None] - estimates[:, -2][None, :]
+        crosses = np.zeros(now.shape, dtype=np.int8)
+        crosses[(now > 0) & (prev <= 0)] = 1
+        crosses[(now < 0) & (prev >= 0)] = -1
+        return crosses
+
+TREND_BEARISH = -1
+TREND_BULLISH = 1
+
+# alert_stream keeps the original indicator's codes: +1 when the kernel turns
+# down (bearish change or cross), -1 when it turns up
+ALERT_TURNED_DOWN = 1
+ALERT_TURNED_UP = -1
+
+def alert_direction(alert: int) -> int:
+    # The trend the kernel turned to on an alert, 0 without one
+    if alert == ALERT_TURNED_UP:
+        return TREND_BULLISH
+    if alert == ALERT_TURNED_DOWN:
+        return TREND_BEARISH
+    return 0
+
+class KernelOutputStore:
+    # Column arrays of the latest kernel output, indexed by SymbolRegistry slot.
+    # crossovers[slot] is the bank's last-bar KernelBank.crossovers matrix.
+    def __init__(self, registry: SymbolRegistry = None, capacity: int = 16, members: int = 2):
+        self.registry = registry if registry is not None else SymbolRegistry(capacity)
+        capacity = self.registry.capacity
+        self.trend = np.full(capacity, TREND_BEARISH, dtype=np.int8)
+        self.alert = np.zeros(capacity, dtype=np.int8)
+        self.estimate = np.full(capacity, np.nan)
+        self.ready = np.zeros(capacity, dtype=bool)
+        self.crossovers = np.zeros((capacity, members, members), dtype=np.int8)
+
+    def allocate(self, symbol: Symbol) -> 'KernelOutput':
+        slot = self.registry.add(symbol)
+        if slot >= len(self.trend):
+            self._grow(self.registry.capacity)
+        output = KernelOutput(self, slot)
+        output.clear()
+        return output
+
+    def release(self, output: 'KernelOutput'):
+        output.clear()
+
+    def alerting(self) -> List[Tuple[Symbol, int]]:
+        # (symbol, alert) for the slots that raised an alert on their last update
+        slots = np.flatnonzero(self.alert[:self.registry.size])
+        return [(self.registry.symbols[slot], int(self.alert[slot])) for slot in slots]
+
+    def turning(self) -> List[Tuple[Symbol, int]]:
+        # (symbol, TREND_BULLISH / TREND_BEARISH) for the kernels that just turned
+        return [(symbol, alert_direction(alert)) for symbol, alert in self.alerting()]
+
+    def crossing(self) -> List[Tuple[Symbol, np.ndarray]]:
+        # (symbol, crossover matrix) for the slots where any two bank members crossed on the last bar
+        slots = np.flatnonzero(self.crossovers[:self.registry.size].any(axis=(1, 2)))
+        return [(self.registry.symbols[slot], self.crossovers[slot]) for slot in slots]
+
+    def _grow(self, capacity: int):
+        self.trend = ensure_capacity(self.trend, capacity, TREND_BEARISH)
+        self.alert = ensure_capacity(self.alert, capacity, 0)
+        self.estimate = ensure_capacity(self.estimate, capacity, np.nan)
+        self.ready = ensure_capacity(self.ready, capacity, False)
+        self.crossovers = ensure_capacity(self.crossovers, capacity, 0)
+
+    def _resize_members(self, members: int):
+        # A bank with a different member count invalidates every stored matrix
+        self.crossovers = np.zeros((len(self.crossovers), members, members), dtype=np.int8)
+
+class KernelOutput:
+    __slots__ = ('store', 'slot')
+
+    def __init__(self, store: KernelOutputStore, slot: int):
+        self.store = store
+        self.slot = slot
+
+    @property
+    def trend(self) -> int:
+        return int(self.store.trend[self.slot])
+
+    @property
+    def alert(self) -> int:
+        return int(self.store.alert[self.slot])
+
+    @property
+    def estimate(self) -> float:
+        return float(self.store.estimate[self.slot])
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.store.ready[self.slot])
+
+    @property
+    def crossovers(self) -> np.ndarray:
+        return self.store.crossovers[self.slot]
+
+    def write(self, trend: int, alert: int, estimate: float, ready: bool = None, crossovers: np.ndarray = None):
+        store, slot = self.store, self.slot
+        store.trend[slot] = trend
+        store.alert[slot] = alert
+        store.estimate[slot] = estimate
+        store.ready[slot] = not np.isnan(estimate) if ready is None else ready
+        if crossovers is not None:
+            if crossovers.shape != store.crossovers.shape[1:]:
+                store._resize_members(len(crossovers))
+            store.crossovers[slot] = crossovers
+
+    def clear(self):
+        self.write(TREND_BEARISH, 0, np.nan)
+        self.store.crossovers[self.slot] = 0
 
 class NadarayaWatsonRationalQuadratic:
     def __init__(self, algorithm: QCAlgorithm, lookback_window: float = 8.0, relative_weighting: float = 8.0, 
-                 start_bar: int = 25, smooth_colors: bool = False, lag: int = 2):
+                 start_bar: int = 25, smooth_colors: bool = False, lag: int = 2,
+                 variants: List[KernelSpec] = None):
         self.algorithm = algorithm
         self.lookback_window = lookback_window
         self.relative_weighting = relative_weighting
         self.start_bar = start_bar
         self.smooth_colors = smooth_colors
         self.lag = lag
+        # Extra smoothing variants evaluated alongside the two estimates used for signals
+        self.variants = list(variants) if variants else []
         
         self.c_bullish = '#3AFF17'  # Green
         self.c_bearish = '#FD1707'  # Red
         
-        self.data_window = RollingWindow[float](start_bar + 1)
+        self.data_window = RollingWindow[float](self.window_size)
+        self.bank = self._build_bank()
 
-    def kernel_regression(self, source: np.ndarray, h: float) -> np.ndarray:
-        size = len(source)
-        yhat = np.zeros(size)
-        
-        for i in range(size):
-            if i < self.start_bar:
-                yhat[i] = np.nan
-            else:
-                current_weight = 0.0
-                cumulative_weight = 0.0
-                for j in range(i + 1):
-                    y = source[j]
-                    w = (1 + (j ** 2 / ((h ** 2) * 2 * self.relative_weighting))) ** -self.relative_weighting
-                    current_weight += y * w
-                    cumulative_weight += w
-                yhat[i] = current_weight / cumulative_weight
-        
-        return yhat
+    @property
+    def window_size(self) -> int:
+        return self.start_bar + SIGNAL_COLUMNS
+
+    def _build_bank(self) -> KernelBank:
+        return KernelBank([
+            ('rational_quadratic', self.lookback_window, self.relative_weighting),
+            ('rational_quadratic', self.lookback_window - self.lag, self.relative_weighting),
+        ] + self.variants, self.window_size)
+
+    def reconfigure(self, lookback_window: float = None, relative_weighting: float = None, start_bar: int = None):
+        # Only the kernel bank and the window length depend on these, the window contents are kept
+        if lookback_window is not None:
+            self.lookback_window = lookback_window
+        if relative_weighting is not None:
+            self.relative_weighting = relative_weighting
+        if start_bar is not None and start_bar != self.start_bar:
+            window = self.get_state()['window']
+            self.start_bar = start_bar
+            self.data_window = RollingWindow[float](self.window_size)
+            self.set_state({'window': window[-self.window_size:]})
+        self.bank = self._build_bank()
+
+    def _source(self) -> np.ndarray:
+        return np.array([x for x in self.data_window])[::-1]
+
+    def _trend_and_alert(self, yhat1: np.ndarray, yhat2: np.ndarray, offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        # offset is the window index of the first column, bars before index 2 carry no rate signal
+        size = len(yhat1)
+        index = np.arange(offset, offset + size)
+        prev1 = np.concatenate(([np.nan], yhat1[:-1]))
+        prev2 = np.concatenate(([np.nan, np.nan], yhat1[:-2]))[:size]
+        prev_yhat2 = np.concatenate(([np.nan], yhat2[:-1]))
+
+        with np.errstate(invalid='ignore'):
+            is_bearish = (index >= 2) & (prev1 > yhat1)
+            is_bullish = (index >= 2) & (prev1 < yhat1)
+            is_bearish_change = is_bearish & (prev2 < prev1)
+            is_bullish_change = is_bullish & (prev2 > prev1)
+
+            is_bullish_cross = (index >= 1) & (yhat2 > yhat1) & (prev_yhat2 <= prev1)
+            is_bearish_cross = (index >= 1) & (yhat2 < yhat1) & (prev_yhat2 >= prev1)
+
+            is_bullish_smooth = yhat2 > yhat1
+
+        trend = np.where(is_bullish_smooth if self.smooth_colors else is_bullish, TREND_BULLISH, TREND_BEARISH).astype(np.int8)
 
-    def calculate(self) -> Dict[str, Any]:
-        source = np.array([x for x in self.data_window])[::-1]
-        size = len(source)
-        
-        yhat1 = self.kernel_regression(source, self.lookback_window)
-        yhat2 = self.kernel_regression(source, self.lookback_window - self.lag)
-        
-        is_bearish = np.zeros(size, dtype=bool)
-        is_bullish = np.zeros(size, dtype=bool)
-        is_bearish_change = np.zeros(size, dtype=bool)
-        is_bullish_change = np.zeros(size, dtype=bool)
-        
-        for i in range(2, size):
-            is_bearish[i] = yhat1[i-1] > yhat1[i]
-            is_bullish[i] = yhat1[i-1] < yhat1[i]
-            is_bearish_change[i] = is_bearish[i] and (yhat1[i-2] < yhat1[i-1])
-            is_bullish_change[i] = is_bullish[i] and (yhat1[i-2] > yhat1[i-1])
-        
-        is_bullish_cross = np.zeros(size, dtype=bool)
-        is_bearish_cross = np.zeros(size, dtype=bool)
-        
-        for i in range(1, size):
-            is_bullish_cross[i] = yhat2[i] > yhat1[i] and yhat2[i-1] <= yhat1[i-1]
-            is_bearish_cross[i] = yhat2[i] < yhat1[i] and yhat2[i-1] >= yhat1[i-1]
-        
-        is_bullish_smooth = yhat2 > yhat1
-        is_bearish_smooth = yhat2 < yhat1
-        
-        color_by_cross = np.where(is_bullish_smooth, self.c_bullish, self.c_bearish)
-        color_by_rate = np.where(is_bullish, self.c_bullish, self.c_bearish)
-        plot_color = color_by_cross if self.smooth_colors else color_by_rate
-        
         alert_bullish = is_bearish_cross if self.smooth_colors else is_bearish_change
         alert_bearish = is_bullish_cross if self.smooth_colors else is_bullish_change
+        alert = np.where(alert_bearish, -1, np.where(alert_bullish, 1, 0)).astype(np.int8)
+
+        return trend, alert
+
+    def calculate(self) -> Dict[str, Any]:
+        # Full-window analysis for research and plotting, the live path is update_output
+        source = self._source()
+        
+        # Every bank member over the whole window in one pass
+        estimates = self.bank.evaluate(source)
+        estimates[:, :self.start_bar] = np.nan
+        yhat1, yhat2 = estimates[0], estimates[1]
         
-        alert_stream = np.where(alert_bearish, -1, np.where(alert_bullish, 1, 0))
+        trend, alert_stream = self._trend_and_alert(yhat1, yhat2)
         
         return {
             'yhat1': yhat1,
             'yhat2': yhat2,
-            'plot_color': plot_color,
-            'alert_bullish': alert_bullish,
-            'alert_bearish': alert_bearish,
+            'estimates': estimates,
+            'trend': trend,
+            'alert_bullish': alert_stream == 1,
+            'alert_bearish': alert_stream == -1,
             'alert_stream': alert_stream
         }
 
@@ -86,29 +280,73 @@ class NadarayaWatsonRationalQuadratic:
         self.data_window.Add(new_data)
         return self.calculate()
 
+    def update_output(self, new_data: float, output: KernelOutput) -> KernelOutput:
+        # Per-bar path: only the last three columns of every bank member feed the
+        # last bar's codes and the members' crossovers
+        self.data_window.Add(new_data)
+        source = self._source()
+        size = len(source)
+
+        tail = self.bank.evaluate_tail(source, SIGNAL_COLUMNS)
+        offset = size - tail.shape[1]
+        tail[:, :max(self.start_bar - offset, 0)] = np.nan
+
+        trend, alert = self._trend_and_alert(tail[0], tail[1], offset)
+        # Until all three columns are valid the codes are defaults, not readings
+        output.write(trend[-1], alert[-1], tail[0, -1], ready=not np.isnan(tail[:2]).any(),
+                     crossovers=self.bank.crossovers(tail))
+        return output
+
+    def trend_color(self, trend: int) -> str:
+        # Colors are only needed when something is plotted
+        return self.c_bullish if trend == TREND_BULLISH else self.c_bearish
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        # Oldest first, so restoring is a straight replay through Add
+        return {'window': np.array([x for x in self.data_window], dtype=np.float64)[::-1]}
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        self.data_window.Reset()
+        for value in state['window']:
+            self.data_window.Add(float(value))
+
+    def crossovers(self, results: Dict[str, Any]) -> np.ndarray:
+        # Rows and columns follow the bank: yhat1, yhat2, then the variants
+        return self.bank.crossovers(results['estimates'])
+
     def get_signals(self, results: Dict[str, Any]) -> Dict[str, Any]:
         last_index = -1
         return {
-            'trend': 'bullish' if results['plot_color'][last_index] == self.c_bullish else 'bearish',
+            'trend': 'bullish' if results['trend'][last_index] == TREND_BULLISH else 'bearish',
             'alert': results['alert_stream'][last_index],
             'estimate': results['yhat1'][last_index]
         }
 
 class KernelRegressionIndicator(PythonIndicator):
-    def __init__(self, algorithm: QCAlgorithm, symbol: Symbol):
+    def __init__(self, algorithm: QCAlgorithm, symbol: Symbol,
+                 nw: NadarayaWatsonRationalQuadratic = None, show_estimate: bool = True,
+                 output_store: KernelOutputStore = None):
         self.algorithm = algorithm
         self.symbol = symbol
-        self.nw = NadarayaWatsonRationalQuadratic(algorithm)
+        self.nw = nw if nw is not None else NadarayaWatsonRationalQuadratic(algorithm)
+        self.show_estimate = show_estimate
+        self.output = (output_store if output_store is not None else KernelOutputStore(capacity=1)).allocate(symbol)
         self.Name = f"{self.symbol.Value}_KernelRegression"
 
     def Update(self, input: BaseData) -> bool:
         if not input.Symbol == self.symbol:
             return False
         
-        results = self.nw.update(input.Value)
-        signals = self.nw.get_signals(results)
+        self.nw.update_output(input.Value, self.output)
         
-        self.algorithm.Plot(self.Name, "Estimate", results['yhat1'][-1])
-        self.algorithm.Plot(self.Name, "Price", input.Value)
+        if self.show_estimate:
+            self.algorithm.Plot(self.Name, "Estimate", self.output.estimate)
+            self.algorithm.Plot(self.Name, "Price", input.Value)
         
-        return True
\ No newline at end of file
+        return True
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return self.nw.get_state()
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        self.nw.set_state(state)
\ No newline at end of file
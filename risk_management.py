@@ -1,7 +1,8 @@
 from AlgorithmImports import *
 import numpy as np
-from scipy.stats import norm
 from typing import Dict, List
+from checkpoint import symbol_key, pack_windows, unpack_windows
+from symbol_registry import SymbolRegistry, ensure_capacity
 
 class LorentzianAdaptiveRiskManager(RiskManagementModel):
     def __init__(self, algorithm: QCAlgorithm, 
@@ -9,7 +10,9 @@ class LorentzianAdaptiveRiskManager(RiskManagementModel):
                  base_max_leverage: float = 2.0,
                  volatility_lookback: int = 30, 
                  base_max_volatility: float = 0.05,
-                 kernel_confidence_threshold: float = 0.7):
+                 kernel_confidence_threshold: float = 0.7,
+                 registry: SymbolRegistry = None,
+                 kernel_outputs: 'KernelOutputStore' = None):
         self.algorithm = algorithm
         self.base_max_drawdown = base_max_drawdown
         self.base_max_leverage = base_max_leverage
@@ -18,15 +21,20 @@ class LorentzianAdaptiveRiskManager(RiskManagementModel):
         self.kernel_confidence_threshold = kernel_confidence_threshold
         
         self.peak_value = 0
-        self.volatility_indicators: Dict[Symbol, StandardDeviation] = {}
-        self.kernel_indicators: Dict[Symbol, KernelRegressionIndicator] = {}
+        # Kernel outputs share the registry, so a symbol's slot indexes both
+        self.kernel_outputs = kernel_outputs
+        if registry is None:
+            registry = kernel_outputs.registry if kernel_outputs is not None else SymbolRegistry()
+        self.registry = registry
+        # Ring buffer of volatility inputs per registry slot, and how many were added
+        self.volatility_prices = np.full((registry.capacity, volatility_lookback), np.nan)
+        self.volatility_counts = np.zeros(registry.capacity, dtype=np.int64)
         self.current_drawdown = 0
         self.current_leverage = 0
 
     def Initialize(self, algorithm: QCAlgorithm, portfolio: SecurityPortfolioManager):
         for symbol in algorithm.Securities.Keys:
-            self.volatility_indicators[symbol] = StandardDeviation(self.volatility_lookback)
-            self.kernel_indicators[symbol] = algorithm.Indicators[f"{symbol.Value}_KernelRegression"]
+            self._reset_volatility(self._slot(symbol))
 
     def ManageRisk(self, algorithm: QCAlgorithm, targets: List[IPortfolioTarget]) -> List[IPortfolioTarget]:
         current_value = algorithm.Portfolio.TotalPortfolioValue
@@ -75,26 +83,27 @@ class LorentzianAdaptiveRiskManager(RiskManagementModel):
     def _detect_market_regime(self) -> float:
         # Use the kernel regression to detect market regime
         # Returns a value between -1 (bearish) and 1 (bullish)
-        regime_indicators = []
-        for kernel_indicator in self.kernel_indicators.values():
-            if kernel_indicator.IsReady:
-                trend = 1 if kernel_indicator.Current.Value['trend'] == 'bullish' else -1
-                regime_indicators.append(trend)
+        if self.kernel_outputs is None:
+            return 0
+        size = self.registry.size
+        ready = self.kernel_outputs.ready[:size]
+        if not ready.any():
+            return 0
         
-        return np.mean(regime_indicators) if regime_indicators else 0
+        return float(self.kernel_outputs.trend[:size][ready].mean())
 
     def _assess_model_confidence(self) -> float:
         # Assess the confidence of the model based on recent performance
         # Returns a value between 0 (low confidence) and 1 (high confidence)
-        confidences = []
-        for symbol, kernel_indicator in self.kernel_indicators.items():
-            if kernel_indicator.IsReady:
-                price = self.algorithm.Securities[symbol].Price
-                estimate = kernel_indicator.Current.Value['estimate']
-                confidence = 1 - abs(price - estimate) / price
-                confidences.append(confidence)
+        if self.kernel_outputs is None:
+            return 0.5
+        total, count = 0.0, 0
+        for slot in np.flatnonzero(self.kernel_outputs.ready[:self.registry.size]):
+            price = self.algorithm.Securities[self.registry.symbols[slot]].Price
+            total += 1 - abs(price - self.kernel_outputs.estimate[slot]) / price
+            count += 1
         
-        return np.mean(confidences) if confidences else 0.5
+        return total / count if count else 0.5
 
     def _check_individual_risks(self, targets: List[IPortfolioTarget], max_volatility: float) -> List[IPortfolioTarget]:
         new_targets = []
@@ -106,8 +115,7 @@ class LorentzianAdaptiveRiskManager(RiskManagementModel):
             if not security.HasData:
                 continue
 
-            self.volatility_indicators[symbol].Update(self.algorithm.Time, security.Price)
-            current_volatility = self.volatility_indicators[symbol].Current.Value / security.Price
+            current_volatility = self._update_volatility(self._slot(symbol), float(security.Price)) / security.Price
 
             if current_volatility > max_volatility:
                 self.algorithm.Log(f"Volatility cap reached for {symbol}. Reducing position.")
@@ -128,12 +136,12 @@ class LorentzianAdaptiveRiskManager(RiskManagementModel):
 
     def _adjust_position_size(self, target: IPortfolioTarget) -> IPortfolioTarget:
         symbol = target.Symbol
-        kernel_indicator = self.kernel_indicators[symbol]
+        slot = self.registry.slot(symbol)
         
-        if not kernel_indicator.IsReady:
+        if self.kernel_outputs is None or not 0 <= slot < len(self.kernel_outputs.ready) or not self.kernel_outputs.ready[slot]:
             return target
         
-        confidence = kernel_indicator.Current.Value['estimate']
+        confidence = self.kernel_outputs.estimate[slot]
         if confidence > self.kernel_confidence_threshold:
             # Increase position size if confidence is high
             new_quantity = int(target.Quantity * 1.2)  # Increase by 20%
@@ -146,12 +154,63 @@ class LorentzianAdaptiveRiskManager(RiskManagementModel):
         return PortfolioTarget(symbol, new_quantity)
 
     def OnSecuritiesChanged(self, algorithm: QCAlgorithm, changes: SecurityChanges):
+        # Slots are released by whoever owns the registry, only this model's rows are reset here
         for added in changes.AddedSecurities:
-            self.volatility_indicators[added.Symbol] = StandardDeviation(self.volatility_lookback)
-            self.kernel_indicators[added.Symbol] = algorithm.Indicators[f"{added.Symbol.Value}_KernelRegression"]
+            self._reset_volatility(self._slot(added.Symbol))
         
         for removed in changes.RemovedSecurities:
-            if removed.Symbol in self.volatility_indicators:
-                del self.volatility_indicators[removed.Symbol]
-            if removed.Symbol in self.kernel_indicators:
-                del self.kernel_indicators[removed.Symbol]
\ No newline at end of file
+            self.remove_symbol(removed.Symbol)
+
+    def remove_symbol(self, symbol: Symbol):
+        # Must run before the registry releases the slot, or the row is not found
+        slot = self.registry.slot(symbol)
+        if 0 <= slot < len(self.volatility_counts):
+            self._reset_volatility(slot)
+
+    def _slot(self, symbol: Symbol) -> int:
+        slot = self.registry.add(symbol)
+        if slot >= len(self.volatility_counts):
+            self.volatility_prices = ensure_capacity(self.volatility_prices, self.registry.capacity, np.nan)
+            self.volatility_counts = ensure_capacity(self.volatility_counts, self.registry.capacity, 0)
+        return slot
+
+    def _reset_volatility(self, slot: int):
+        self.volatility_prices[slot] = np.nan
+        self.volatility_counts[slot] = 0
+
+    def _update_volatility(self, slot: int, price: float) -> float:
+        # Population standard deviation over the last volatility_lookback prices
+        self.volatility_prices[slot, self.volatility_counts[slot] % self.volatility_lookback] = price
+        self.volatility_counts[slot] += 1
+        return float(np.nanstd(self.volatility_prices[slot]))
+
+    def _volatility_window(self, slot: int) -> np.ndarray:
+        # Oldest first
+        count = int(self.volatility_counts[slot])
+        size = min(count, self.volatility_lookback)
+        index = (count - size + np.arange(size)) % self.volatility_lookback
+        return self.volatility_prices[slot, index]
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        slots = [slot for slot in self.registry.active_slots() if slot < len(self.volatility_counts) and self.volatility_counts[slot] > 0]
+        matrix, lengths = pack_windows([self._volatility_window(slot) for slot in slots])
+        return {
+            'metrics': np.array([self.peak_value, self.current_drawdown, self.current_leverage], dtype=np.float64),
+            'volatility_keys': np.array([symbol_key(self.registry.symbols[slot]) for slot in slots], dtype=np.str_),
+            'volatility_windows': matrix,
+            'volatility_lengths': lengths
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        self.peak_value, self.current_drawdown, self.current_leverage = (float(x) for x in state['metrics'])
+
+        symbols = {symbol_key(symbol): symbol for symbol in self.algorithm.Securities.Keys}
+        windows = unpack_windows(state['volatility_windows'], state['volatility_lengths'])
+        for key, window in zip(state['volatility_keys'], windows):
+            symbol = symbols.get(str(key))
+            if symbol is None:
+                continue
+            slot = self._slot(symbol)
+            self._reset_volatility(slot)
+            for price in window[-self.volatility_lookback:]:
+                self._update_volatility(slot, float(price))
\ No newline at end of file
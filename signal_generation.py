@@ -2,6 +2,7 @@ from AlgorithmImports import *
 from enum import Enum
 from typing import Dict, List
 import numpy as np
+from symbol_registry import SymbolRegistry, ensure_capacity
 
 class SignalType(Enum):
     BUY = 1
@@ -9,49 +10,78 @@ class SignalType(Enum):
     HOLD = 0
 
 class SignalGenerator:
-    def __init__(self, algorithm: QCAlgorithm, symbols: List[Symbol], ml_model_wrapper: MLModelWrapper):
+    def __init__(self, algorithm: QCAlgorithm, symbols: List[Symbol], ml_model_wrapper: MLModelWrapper,
+                 registry: SymbolRegistry = None):
         self.algorithm = algorithm
         self.symbols = symbols
         self.ml_model_wrapper = ml_model_wrapper
-        self.current_positions: Dict[Symbol, float] = {symbol: 0 for symbol in symbols}
-        self.last_signals: Dict[Symbol, SignalType] = {symbol: SignalType.HOLD for symbol in symbols}
+        self.registry = registry if registry is not None else SymbolRegistry(max(len(symbols), 1))
+        # Indexed by registry slot; last_signals holds SignalType values
+        self.current_positions = np.zeros(self.registry.capacity)
+        self.last_signals = np.zeros(self.registry.capacity, dtype=np.int8)
+        for symbol in symbols:
+            self._slot(symbol)
 
-    def generate_signals(self) -> Dict[Symbol, SignalType]:
+    def _slot(self, symbol: Symbol) -> int:
+        slot = self.registry.add(symbol)
+        if slot >= len(self.current_positions):
+            self.current_positions = ensure_capacity(self.current_positions, self.registry.capacity, 0.0)
+            self.last_signals = ensure_capacity(self.last_signals, self.registry.capacity, SignalType.HOLD.value)
+        return slot
+
+    def generate_signals(self, predictions: Dict[Symbol, int] = None) -> Dict[Symbol, SignalType]:
+        # predictions: this bar's KNN vote per symbol; without them the wrapper's last value is used
         signals = {}
         for symbol in self.symbols:
-            prediction = self.ml_model_wrapper.Current.Value[symbol]['prediction']
+            if predictions is None:
+                prediction = self.ml_model_wrapper.Current.Value[symbol]['prediction']
+            elif symbol in predictions:
+                prediction = predictions[symbol]
+            else:
+                continue
             signal = self._get_signal(symbol, prediction)
             signals[symbol] = signal
         return signals
 
     def _get_signal(self, symbol: Symbol, prediction: float) -> SignalType:
         threshold = self.algorithm.Settings.signal_threshold
-        if prediction > threshold and self.current_positions[symbol] <= 0:
+        position = self.current_positions[self._slot(symbol)]
+        if prediction > threshold and position <= 0:
             return SignalType.BUY
-        elif prediction < -threshold and self.current_positions[symbol] >= 0:
+        elif prediction < -threshold and position >= 0:
             return SignalType.SELL
         return SignalType.HOLD
 
     def execute_trades(self, signals: Dict[Symbol, SignalType]):
         for symbol, signal in signals.items():
-            if signal != self.last_signals[symbol]:
+            slot = self._slot(symbol)
+            if signal.value != self.last_signals[slot]:
                 self._execute_trade(symbol, signal)
-                self.last_signals[symbol] = signal
+                self.last_signals[slot] = signal.value
 
     def _execute_trade(self, symbol: Symbol, signal: SignalType):
         if signal == SignalType.BUY:
             self.algorithm.SetHoldings(symbol, 1)  # Full long position
-            self.current_positions[symbol] = 1
+            self.current_positions[self._slot(symbol)] = 1
             self.algorithm.Log(f"Buying {symbol}")
         elif signal == SignalType.SELL:
             self.algorithm.SetHoldings(symbol, -1)  # Full short position
-            self.current_positions[symbol] = -1
+            self.current_positions[self._slot(symbol)] = -1
             self.algorithm.Log(f"Selling {symbol}")
         # HOLD signal does nothing
 
+    def remove_symbol(self, symbol: Symbol):
+        # Resets the symbol's rows before the registry hands its slot to another symbol
+        slot = self.registry.slot(symbol)
+        if 0 <= slot < len(self.last_signals):
+            self.current_positions[slot] = 0
+            self.last_signals[slot] = SignalType.HOLD.value
+        if symbol in self.symbols:
+            self.symbols.remove(symbol)
+
     def update_positions(self):
         for symbol in self.symbols:
-            self.current_positions[symbol] = self.algorithm.Portfolio[symbol].Quantity
+            self.current_positions[self._slot(symbol)] = self.algorithm.Portfolio[symbol].Quantity
 
 class SignalManagerAlphaModel(AlphaModel):
     def __init__(self, symbols: List[Symbol], ml_model_wrapper: MLModelWrapper):
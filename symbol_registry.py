@@ -0,0 +1,122 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class SymbolRegistry:
+    # Maps each Symbol to a dense integer slot shared by every component, so
+    # per-symbol state can live in arrays indexed by slot. Freed slots are reused.
+    def __init__(self, capacity: int = 16):
+        self.slots: Dict[Symbol, int] = {}
+        self.symbols: List[Optional[Symbol]] = [None] * capacity
+        self.free_slots: List[int] = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, symbol: Symbol) -> bool:
+        return symbol in self.slots
+
+    @property
+    def capacity(self) -> int:
+        return len(self.symbols)
+
+    def add(self, symbol: Symbol) -> int:
+        slot = self.slots.get(symbol)
+        if slot is not None:
+            return slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.size
+            self.size += 1
+            if slot == len(self.symbols):
+                self.symbols.extend([None] * len(self.symbols))
+        self.slots[symbol] = slot
+        self.symbols[slot] = symbol
+        return slot
+
+    def remove(self, symbol: Symbol) -> int:
+        slot = self.slots.pop(symbol, -1)
+        if slot >= 0:
+            self.symbols[slot] = None
+            self.free_slots.append(slot)
+        return slot
+
+    def slot(self, symbol: Symbol) -> int:
+        return self.slots.get(symbol, -1)
+
+    def symbol(self, slot: int) -> Optional[Symbol]:
+        return self.symbols[slot]
+
+    def active_slots(self) -> np.ndarray:
+        return np.array(sorted(self.slots.values()), dtype=np.int64)
+
+
+def ensure_capacity(array: np.ndarray, capacity: int, fill: Any) -> np.ndarray:
+    # Grows the first axis of a slot-indexed array to the registry's capacity
+    if len(array) >= capacity:
+        return array
+    extra = np.full((capacity - len(array),) + array.shape[1:], fill, dtype=array.dtype)
+    return np.concatenate([array, extra])
+
+
+class SlotMap:
+    # Dict-like {Symbol: value} backed by a list indexed by registry slot
+    def __init__(self, registry: SymbolRegistry):
+        self.registry = registry
+        self.values_by_slot: List[Any] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, symbol: Symbol) -> bool:
+        return self.get(symbol) is not None
+
+    def __getitem__(self, symbol: Symbol) -> Any:
+        value = self.get(symbol)
+        if value is None:
+            raise KeyError(symbol)
+        return value
+
+    def __setitem__(self, symbol: Symbol, value: Any):
+        slot = self.registry.add(symbol)
+        if slot >= len(self.values_by_slot):
+            self.values_by_slot.extend([None] * (self.registry.capacity - len(self.values_by_slot)))
+        if self.values_by_slot[slot] is None:
+            self.count += 1
+        self.values_by_slot[slot] = value
+
+    def __iter__(self) -> Iterator[Symbol]:
+        return (symbol for symbol, _ in self.items())
+
+    def at(self, slot: int) -> Any:
+        return self.values_by_slot[slot] if 0 <= slot < len(self.values_by_slot) else None
+
+    def get(self, symbol: Symbol, default: Any = None) -> Any:
+        value = self.at(self.registry.slot(symbol))
+        return default if value is None else value
+
+    def pop(self, symbol: Symbol, default: Any = None) -> Any:
+        slot = self.registry.slot(symbol)
+        value = self.at(slot)
+        if value is None:
+            return default
+        self.values_by_slot[slot] = None
+        self.count -= 1
+        return value
+
+    def items(self) -> Iterator[Tuple[Symbol, Any]]:
+        for slot, value in enumerate(self.values_by_slot):
+            if value is not None:
+                yield self.registry.symbols[slot], value
+
+    def keys(self) -> List[Symbol]:
+        return [symbol for symbol, _ in self.items()]
+
+    def values(self) -> Iterator[Any]:
+        return (value for value in self.values_by_slot if value is not None)
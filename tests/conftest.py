@@ -0,0 +1,92 @@
+import os
+import sys
+import types
+import typing
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _RollingWindow:
+    # Newest first, like LEAN's RollingWindow
+    def __init__(self, size):
+        self.size = size
+        self.items = []
+
+    def Add(self, value):
+        self.items.insert(0, value)
+        del self.items[self.size:]
+
+    def Reset(self):
+        self.items = []
+
+    def __iter__(self):
+        return iter(list(self.items))
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    @property
+    def Count(self):
+        return len(self.items)
+
+    @property
+    def IsReady(self):
+        return len(self.items) == self.size
+
+
+class _Generic:
+    def __init__(self, cls):
+        self.cls = cls
+
+    def __getitem__(self, _):
+        return self.cls
+
+
+class ObjectStore(dict):
+    def SaveBytes(self, key, payload):
+        self[key] = bytes(payload)
+
+    def ReadBytes(self, key):
+        return self[key]
+
+    def ContainsKey(self, key):
+        return key in self
+
+
+def _install_algorithm_imports():
+    # The pure-numpy components only need a few LEAN names to import outside LEAN
+    module = types.ModuleType("AlgorithmImports")
+    for name in ("QCAlgorithm", "PythonIndicator", "RiskManagementModel", "AlphaModel", "Symbol",
+                 "BaseData", "Slice", "TradeBar", "SecurityPortfolioManager", "SecurityChanges",
+                 "IPortfolioTarget", "PortfolioTarget"):
+        setattr(module, name, type(name, (), {}))
+    module.RollingWindow = _Generic(_RollingWindow)
+    module.Resolution = types.SimpleNamespace(Minute="Minute", Hour="Hour", Daily="Daily")
+    module.np = np
+    module.pd = pd
+    module.datetime = datetime
+    module.timedelta = timedelta
+    for name in ("Any", "Dict", "List", "Optional", "Tuple"):
+        setattr(module, name, getattr(typing, name))
+    module.__all__ = [name for name in vars(module) if not name.startswith('_')]
+    sys.modules["AlgorithmImports"] = module
+
+
+try:
+    import AlgorithmImports  # noqa: F401
+except ImportError:
+    _install_algorithm_imports()
+
+
+class FakeAlgorithm:
+    def __init__(self, symbols=()):
+        self.ObjectStore = ObjectStore()
+        self.Securities = types.SimpleNamespace(Keys=list(symbols))
+        self.logs = []
+
+    def Log(self, message):
+        self.logs.append(message)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from bar_store import LocalBarStore
+
+
+def bars(start, count):
+    times = pd.date_range(start, periods=count, freq='1min')
+    close = np.arange(count, dtype=np.float64) + 100.0
+    return times, close, close + 1.0, close - 1.0, close, np.ones(count)
+
+
+def test_append_skips_rows_already_stored(tmp_path):
+    store = LocalBarStore(str(tmp_path))
+    assert store.append('SPY', 'minute', *bars('2024-01-02 09:30', 10)) == 10
+    assert store.append('SPY', 'minute', *bars('2024-01-02 09:35', 10)) == 5
+    assert store.rows('SPY', 'minute') == 15
+    assert (np.diff(store.read('SPY', 'minute')['time']) > np.timedelta64(0, 'us')).all()
+
+
+def test_range_read_is_a_memmap_view(tmp_path):
+    store = LocalBarStore(str(tmp_path))
+    store.append('SPY', 'minute', *bars('2024-01-02 09:30', 10))
+    columns = store.read('SPY', 'minute', start='2024-01-02 09:32', end='2024-01-02 09:35')
+    assert isinstance(columns['close'], np.memmap)
+    np.testing.assert_array_equal(columns['close'], [102.0, 103.0, 104.0])
+
+
+def test_aligned_inner_and_outer(tmp_path):
+    store = LocalBarStore(str(tmp_path))
+    store.append('SPY', 'minute', *bars('2024-01-02 09:30', 4))
+    store.append('QQQ', 'minute', *bars('2024-01-02 09:32', 4))
+    times, matrix = store.aligned(['SPY', 'QQQ'], 'minute')
+    assert len(times) == 2
+    np.testing.assert_array_equal(matrix, [[102.0, 103.0], [100.0, 101.0]])
+
+    times, matrix = store.aligned(['SPY', 'QQQ'], 'minute', how='outer')
+    assert len(times) == 6
+    assert np.isnan(matrix[1, :2]).all() and np.isnan(matrix[0, 4:]).all()
+
+
+def test_interrupted_write_is_cut_back_on_the_next_append(tmp_path):
+    store = LocalBarStore(str(tmp_path))
+    store.append('SPY', 'minute', *bars('2024-01-02 09:30', 5))
+    # A crash after three bytes of the next time value reached disk
+    with open(tmp_path / 'minute' / 'SPY' / 'time.bin', 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    assert store.rows('SPY', 'minute') == 5
+
+    assert store.append('SPY', 'minute', *bars('2024-01-02 09:30', 8)) == 3
+    columns = store.read('SPY', 'minute')
+    np.testing.assert_array_equal(columns['time'], pd.date_range('2024-01-02 09:30', periods=8, freq='1min').values)
+    np.testing.assert_array_equal(columns['close'], np.arange(8) + 100.0)
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from checkpoint import StateCheckpointer
+from conftest import FakeAlgorithm
+
+
+class Provider:
+    def __init__(self, values, fail=False):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.fail = fail
+
+    def get_state(self):
+        return {'values': self.values.copy()}
+
+    def set_state(self, state):
+        if self.fail:
+            raise ValueError("rejected")
+        self.values = state['values'].copy()
+
+
+def test_round_trip():
+    algorithm = FakeAlgorithm()
+    checkpointer = StateCheckpointer(algorithm)
+    provider = Provider([1.0, 2.0])
+    checkpointer.register("provider", provider)
+    checkpointer.save(datetime(2024, 1, 2, 3, 4, 5))
+
+    provider.values = np.zeros(2)
+    assert checkpointer.restore() == datetime(2024, 1, 2, 3, 4, 5)
+    np.testing.assert_array_equal(provider.values, [1.0, 2.0])
+
+
+def test_truncated_snapshot_falls_back_to_warm_up():
+    algorithm = FakeAlgorithm()
+    checkpointer = StateCheckpointer(algorithm)
+    provider = Provider([1.0, 2.0])
+    checkpointer.register("provider", provider)
+    checkpointer.save(datetime(2024, 1, 1))
+    algorithm.ObjectStore[checkpointer.key] = algorithm.ObjectStore[checkpointer.key][:50]
+
+    provider.values = np.zeros(2)
+    assert checkpointer.restore() is None
+    np.testing.assert_array_equal(provider.values, [0.0, 0.0])
+
+
+def test_failed_set_state_rolls_back_earlier_providers():
+    algorithm = FakeAlgorithm()
+    checkpointer = StateCheckpointer(algorithm)
+    first, second = Provider([1.0]), Provider([2.0])
+    checkpointer.register("first", first)
+    checkpointer.register("second", second)
+    payload = checkpointer.to_bytes(datetime(2024, 1, 1))
+
+    first.values, second.values = np.array([10.0]), np.array([20.0])
+    second.fail = True
+    with pytest.raises(ValueError):
+        checkpointer.from_bytes(payload)
+    np.testing.assert_array_equal(first.values, [10.0])
+
+
+def test_snapshot_from_a_later_run_is_rejected():
+    algorithm = FakeAlgorithm()
+    checkpointer = StateCheckpointer(algorithm)
+    provider = Provider([1.0, 2.0])
+    checkpointer.register("provider", provider)
+    checkpointer.save(datetime(2024, 1, 1))
+
+    provider.values = np.zeros(2)
+    assert checkpointer.restore(not_after=datetime(2023, 1, 1)) is None
+    np.testing.assert_array_equal(provider.values, [0.0, 0.0])
+    assert checkpointer.restore(not_after=datetime(2024, 1, 1)) == datetime(2024, 1, 1)
@@ -0,0 +1,74 @@
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from components import ComponentRegistry
+
+
+def make_registry(**config):
+    return ComponentRegistry(None, SimpleNamespace(**config))
+
+
+def test_disabled_component_is_never_imported():
+    registry = make_registry(use_missing=False)
+    registry.register("missing", "no_such_module_anywhere", lambda module, components: module.Thing(),
+                      enabled=lambda c: c.use_missing)
+    assert registry.get("missing") is None
+    assert "no_such_module_anywhere" not in sys.modules
+    assert registry.build_all() == {}
+    assert registry.disabled() == ["missing"]
+
+
+def test_nested_build_time_is_subtracted_from_the_parent():
+    registry = make_registry()
+
+    def build_child(module, components):
+        time.sleep(0.05)
+        return "child"
+
+    registry.register("child", "json", build_child)
+    registry.register("parent", "json", lambda module, components: (components.get("child"), "parent"))
+    assert registry.get("parent") == ("child", "parent")
+    assert registry.timings["child"]["build"] >= 50
+    assert registry.timings["parent"]["build"] < 25
+
+
+def test_failed_factory_does_not_skew_later_timings():
+    registry = make_registry()
+
+    def fail(module, components):
+        time.sleep(0.05)
+        raise RuntimeError("broken")
+
+    registry.register("broken", "json", fail)
+    with pytest.raises(RuntimeError):
+        registry.get("broken")
+    assert registry._nested == []
+    assert "broken" not in registry.instances
+
+    # A parent that survives a failing dependency is not charged for its time
+    def build_parent(module, components):
+        with pytest.raises(RuntimeError):
+            components.get("broken")
+        return "parent"
+
+    registry.register("parent", "json", build_parent)
+    assert registry.get("parent") == "parent"
+    assert registry._nested == []
+    assert registry.timings["parent"]["build"] < 25
+
+
+def test_timing_report_lists_disabled_components():
+    registry = make_registry(use_plots=False)
+    registry.register("store", "json", lambda module, components: {})
+    registry.register("plots", "no_such_plotting_module", lambda module, components: None,
+                      enabled=lambda c: c.use_plots)
+    registry.build_all()
+    with registry.measure("restore"):
+        pass
+    report = registry.timing_report()
+    assert report.startswith("--- Startup Timing ---")
+    assert "store: import=" in report and "restore: import=0.0ms" in report
+    assert report.splitlines()[-1] == "disabled: plots"
@@ -0,0 +1,78 @@
+import numpy as np
+
+from exit_scheduler import ExitScheduler
+from regression import KernelOutputStore, NadarayaWatsonRationalQuadratic, alert_direction
+
+
+def test_bar_count_exit():
+    scheduler = ExitScheduler(None, wheel_size=8)
+    assert scheduler.schedule('A', 3, 1)
+    assert scheduler.advance() == []
+    assert scheduler.advance() == []
+    assert scheduler.advance() == ['A']
+    assert 'A' not in scheduler
+
+
+def test_horizon_longer_than_the_wheel():
+    scheduler = ExitScheduler(None, wheel_size=4)
+    scheduler.schedule('A', 10, 1)
+    expired = [bar for bar in range(1, 12) if scheduler.advance()]
+    assert expired == [10]
+
+
+def test_max_open_trades():
+    scheduler = ExitScheduler(None, max_open_trades=1)
+    assert scheduler.schedule('A', 4, 1)
+    assert not scheduler.schedule('B', 4, 1)
+    assert scheduler.schedule('A', 6, 1)
+
+
+def test_checkpoint_keeps_remaining_bars():
+    scheduler = ExitScheduler(None)
+    scheduler.schedule('A', 5, -1)
+    scheduler.advance()
+    state = scheduler.get_state()
+    assert state['remaining'].tolist() == [4]
+    assert state['direction'].tolist() == [-1]
+
+
+def turns(series):
+    # Direction the kernel turned to on each bar, 0 when it did not turn
+    nw = NadarayaWatsonRationalQuadratic(None)
+    output = KernelOutputStore(capacity=1).allocate('A')
+    result = []
+    for value in series:
+        nw.update_output(value, output)
+        result.append(alert_direction(output.alert) if output.ready else 0)
+    return np.array(result)
+
+
+def up_then_down():
+    return np.concatenate([np.linspace(100.0, 130.0, 40), np.linspace(130.0, 90.0, 40)])
+
+
+def test_kernel_turns_down_after_the_peak():
+    turned = turns(up_then_down())
+    assert not (turned[:40] == -1).any()
+    assert (turned[40:] == -1).any()
+
+
+def test_dynamic_exit_closes_a_long_when_the_kernel_turns_down():
+    scheduler = ExitScheduler(None, wheel_size=128)
+    scheduler.schedule('long', 1000, 1)
+    scheduler.schedule('short', 1000, -1)
+    closed = {}
+    for bar, turned in enumerate(turns(up_then_down())):
+        for symbol in ('long', 'short'):
+            if scheduler.on_kernel_turn(symbol, turned):
+                closed[symbol] = bar
+    assert closed['long'] >= 40
+    assert 'short' not in closed or closed['short'] < 40
+
+
+def test_dynamic_exit_closes_a_short_when_the_kernel_turns_up():
+    scheduler = ExitScheduler(None, wheel_size=128)
+    scheduler.schedule('short', 1000, -1)
+    series = 230.0 - up_then_down()
+    closed = [bar for bar, turned in enumerate(turns(series)) if scheduler.on_kernel_turn('short', turned)]
+    assert closed and closed[0] >= 40
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from conftest import FakeAlgorithm
+from hot_reload import ConfigReloader
+
+
+class ParameterAlgorithm(FakeAlgorithm):
+    def __init__(self, parameters):
+        super().__init__()
+        self.parameters = parameters
+
+    def GetParameter(self, name):
+        return self.parameters.get(name)
+
+
+def make_config():
+    return SimpleNamespace(feature_list=["RSI", "WT", "CCI", "ADX"], knn_memory_size=2000,
+                           kernel_variants=[], n_neighbors=8, use_dynamic_exits=False, adx_threshold=20)
+
+
+def test_bound_and_watched_parameters_are_applied():
+    config = make_config()
+    algorithm = ParameterAlgorithm({'n_neighbors': '12', 'use_dynamic_exits': 'true'})
+    reloader = ConfigReloader(algorithm, config)
+    calls = []
+    reloader.bind(["n_neighbors"], lambda: calls.append(config.n_neighbors))
+    reloader.watch(["use_dynamic_exits"])
+
+    assert sorted(reloader.poll()) == ["n_neighbors", "use_dynamic_exits"]
+    assert calls == [12]
+    assert config.use_dynamic_exits is True
+
+
+def test_structural_and_unbound_parameters_are_not_applied():
+    config = make_config()
+    algorithm = ParameterAlgorithm({'feature_list': 'RSI,WT', 'knn_memory_size': '10',
+                                    'kernel_variants': 'gaussian,6,0', 'adx_threshold': '30'})
+    reloader = ConfigReloader(algorithm, config)
+    reloader.bind(["n_neighbors"], lambda: None)
+
+    assert reloader.poll() == []
+    assert config.feature_list == ["RSI", "WT", "CCI", "ADX"]
+    assert config.knn_memory_size == 2000
+    assert config.kernel_variants == []
+    assert config.adx_threshold == 20
+    assert sum("without a restart" in message for message in algorithm.logs) == 3
+
+    # Each rejection is reported once
+    reloader.poll()
+    assert sum("without a restart" in message for message in algorithm.logs) == 3
+
+
+def test_invalid_value_is_rejected_before_it_reaches_the_config():
+    config = SimpleNamespace(feature_normalization="minmax")
+    algorithm = ParameterAlgorithm({'feature_normalization': 'robust'})
+    reloader = ConfigReloader(algorithm, config)
+    calls = []
+    reloader.bind(["feature_normalization"], lambda: calls.append(config.feature_normalization))
+    reloader.validate("feature_normalization", lambda mode: mode in ('minmax', 'zscore', 'none'))
+
+    assert reloader.poll() == []
+    assert config.feature_normalization == "minmax"
+    assert calls == []
+
+
+def test_failed_handler_rolls_the_config_back():
+    config = SimpleNamespace(kernel_regression_level=25)
+    algorithm = ParameterAlgorithm({'kernel_regression_level': '0'})
+    reloader = ConfigReloader(algorithm, config)
+    calls = []
+
+    def rebuild():
+        calls.append(config.kernel_regression_level)
+        if config.kernel_regression_level < 1:
+            raise ValueError("window size must be positive")
+
+    reloader.bind(["kernel_regression_level"], rebuild)
+    assert reloader.poll() == []
+    assert config.kernel_regression_level == 25
+    # The failed value, then the previous one to rebuild the state from
+    assert calls == [0, 25]
+
+    # The same value is not retried on every poll, a new one is
+    assert reloader.poll() == []
+    assert calls == [0, 25]
+    algorithm.parameters['kernel_regression_level'] = '30'
+    assert reloader.poll() == ["kernel_regression_level"]
+    assert config.kernel_regression_level == 30
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from indicators import Indicators
+
+
+def test_cci_has_no_look_ahead():
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=120))
+    high, low = close + 1, close - 1
+    full = Indicators.cci(high, low, close, 20)
+    prefix = Indicators.cci(high[:60], low[:60], close[:60], 20)
+    np.testing.assert_allclose(full[:60], prefix, equal_nan=True)
+
+
+def test_cci_uses_rolling_mean_deviation():
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(size=50))
+    high, low = close + 1, close - 1
+    tp = pd.Series((high + low + close) / 3)
+    mad = tp.rolling(20).apply(lambda window: np.abs(window - window.mean()).mean(), raw=True)
+    expected = (tp - tp.rolling(20).mean()) / (0.015 * mad)
+    np.testing.assert_allclose(Indicators.cci(high, low, close, 20), expected.values, equal_nan=True)
+
+
+def test_adx_has_no_look_ahead():
+    rng = np.random.default_rng(2)
+    close = 100 + np.cumsum(rng.normal(size=300))
+    high, low = close + rng.uniform(0.5, 1.5, 300), close - rng.uniform(0.5, 1.5, 300)
+    full = Indicators.adx(high, low, close, 20)
+    prefix = Indicators.adx(high[:150], low[:150], close[:150], 20)
+    np.testing.assert_allclose(full[:150], prefix, equal_nan=True)
+    assert not np.isnan(full[1:]).any()
@@ -0,0 +1,41 @@
+import numpy as np
+
+from knn_memory import KNNTrainingMemory
+from labels import LabelStage, build_labels
+
+
+def test_batch_matches_streaming():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(2, 30, 3))
+    close = 100 + rng.normal(size=(2, 30)).cumsum(axis=1)
+
+    batch = LabelStage(None, KNNTrainingMemory(3, 100), horizon=4)
+    batch.load_history(['A', 'B'], features, close)
+
+    streaming = LabelStage(None, KNNTrainingMemory(3, 100), horizon=4)
+    for bar in range(30):
+        for row, symbol in enumerate(['A', 'B']):
+            streaming.update(symbol, features[row, bar], close[row, bar])
+
+    for left, right in zip(batch.memory.ordered(), streaming.memory.ordered()):
+        np.testing.assert_array_equal(left, right)
+
+
+def test_shrinking_horizon_labels_queued_bars_at_the_new_horizon():
+    close = np.array([10.0, 12.0, 9.0, 11.0, 8.0])
+    stage = LabelStage(None, KNNTrainingMemory(1, 100), horizon=4)
+    for bar, price in enumerate(close):
+        stage.update('A', [float(bar)], price)
+    # Bar 0 was labelled at horizon 4 on the last update
+    assert len(stage.memory) == 1
+
+    stage.set_horizon(2)
+    features, labels = stage.memory.ordered()
+    # Bars 1 and 2 now have 2-bar labels from the queued closes
+    np.testing.assert_array_equal(features[1:, 0], [1.0, 2.0])
+    np.testing.assert_array_equal(labels[1:], build_labels(close, 2)[1:3])
+
+    stage.update('A', [5.0], 13.0)
+    features, labels = stage.memory.ordered()
+    assert features[-1, 0] == 3.0
+    assert labels[-1] == np.sign(13.0 - 11.0)
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from bar_store import LocalBarStore
+from conftest import FakeAlgorithm
+from exit_scheduler import ExitScheduler
+from knn_memory import KNNTrainingMemory
+from labels import LabelStage
+from memory_profiler import MemoryProfiler
+from normalization import FeatureNormalizer
+from training_worker import BackgroundTrainer
+
+SYMBOLS = ['A', 'B', 'C']
+
+
+class Leaky:
+    def __init__(self):
+        self.history = []
+
+    def on_bar(self, value):
+        self.history.append(np.full(256, value))
+
+
+class Bounded:
+    def __init__(self):
+        self.window = np.zeros(256)
+
+    def on_bar(self, value):
+        self.window = np.roll(self.window, 1)
+        self.window[0] = value
+
+
+def profile(instances, bars, step, interval_bars=50):
+    algorithm = FakeAlgorithm()
+    profiler = MemoryProfiler(algorithm, SimpleNamespace(instances=instances), interval_bars=interval_bars)
+    for bar in range(bars):
+        step(bar)
+        profiler.on_bar()
+    return profiler
+
+
+def test_growing_component_fails_assert_bounded():
+    leaky, bounded = Leaky(), Bounded()
+
+    def step(bar):
+        leaky.on_bar(bar)
+        bounded.on_bar(bar)
+
+    profiler = profile({'leaky': leaky, 'bounded': bounded}, 1000, step)
+    assert profiler.growing() == ['leaky']
+    with pytest.raises(AssertionError, match='leaky'):
+        profiler.assert_bounded()
+    profiler.assert_bounded(['bounded'])
+
+
+def test_training_pipeline_is_bounded(tmp_path):
+    algorithm = FakeAlgorithm()
+    memory = KNNTrainingMemory(4, capacity=200)
+    label_stage = LabelStage(algorithm, memory, horizon=4)
+    instances = {
+        'normalizer': FeatureNormalizer(algorithm, 4, window=50),
+        'label_stage': label_stage,
+        'trainer': BackgroundTrainer(label_stage),
+        'exit_scheduler': ExitScheduler(algorithm, wheel_size=16, max_open_trades=2),
+        'bar_store': LocalBarStore(str(tmp_path)),
+    }
+    rng = np.random.default_rng(0)
+    times = np.datetime64('2024-01-02T09:30') + np.arange(2000) * np.timedelta64(1, 'm')
+
+    def step(bar):
+        instances['exit_scheduler'].advance()
+        for symbol in SYMBOLS:
+            close = 100.0 + rng.normal()
+            vector = instances['normalizer'].update(symbol, rng.normal(size=4))
+            instances['trainer'].submit(symbol, vector, close)
+            instances['exit_scheduler'].schedule(symbol, 5 + bar % 20, 1)
+            instances['bar_store'].append(symbol, 'minute', times[bar:bar + 1], [close], [close], [close],
+                                          [close], [1.0])
+            instances['bar_store'].read(symbol, 'minute')
+
+    profiler = profile(instances, 2000, step, interval_bars=100)
+    # Every component was sampled after its buffers filled, and none kept growing
+    assert len(profiler.samples) == len(instances)
+    profiler.assert_bounded()
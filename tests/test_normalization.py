@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from normalization import FeatureNormalizer
+
+
+@pytest.mark.parametrize("mode", ["minmax", "zscore"])
+def test_batch_matches_streaming(mode):
+    features = np.random.default_rng(0).normal(size=(1, 80, 3)).cumsum(axis=1)
+    batch = FeatureNormalizer(None, 3, window=20, mode=mode).load_history(['A'], features)
+    streaming = FeatureNormalizer(None, 3, window=20, mode=mode)
+    streamed = np.array([streaming.update('A', vector) for vector in features[0]])
+    np.testing.assert_allclose(batch[0], streamed, atol=1e-9)
+
+
+def test_minmax_window_evicts_old_values():
+    normalizer = FeatureNormalizer(None, 1, window=3)
+    for value in [10.0, 0.0, 1.0, 2.0]:
+        scaled = normalizer.update('A', [value])
+    # 10 left the window, the range is now 0..2
+    assert scaled[0] == pytest.approx(1.0)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        FeatureNormalizer(None, 1, mode='robust')
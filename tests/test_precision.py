@@ -0,0 +1,85 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+from conftest import FakeAlgorithm
+from knn_memory import KNNTrainingMemory, feature_dtype
+from labels import LabelStage
+from normalization import FeatureNormalizer
+from precision import format_precision_report, replay_predictions, validate_precision
+from training_worker import BackgroundTrainer
+
+SYMBOLS = ['A', 'B']
+
+
+def load_feature_engineer():
+    # features/engineer.py in the project, flattened to features.engineer.py here
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'features.engineer.py')
+    spec = importlib.util.spec_from_file_location('features_engineer', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def panel(bars=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(size=(len(SYMBOLS), bars)), axis=1)
+    features = np.stack([close, np.diff(close, prepend=close[:, :1], axis=1), rng.normal(size=close.shape)], axis=2)
+    return features, close
+
+
+def test_replay_in_float64_matches_itself():
+    features, close = panel()
+    results = validate_precision(FakeAlgorithm(), SYMBOLS, features, close, horizon=4, capacity=200,
+                                 n_neighbors=8, window=50, precision='float64')
+    assert results['bars'] > 0
+    assert results['feature_max_abs_error'] == 0.0
+    assert results['prediction_mismatch_rate'] == 0.0
+    assert results['signal_agreement'] == 1.0
+
+
+def test_float32_replay_stays_close_to_float64():
+    features, close = panel()
+    results = validate_precision(FakeAlgorithm(), SYMBOLS, features, close, horizon=4, capacity=200,
+                                 n_neighbors=8, window=50, precision='float32')
+    assert 0.0 < results['feature_max_abs_error'] < 1e-5
+    assert results['signal_agreement'] > 0.9
+
+    report = format_precision_report('float32', results)
+    assert report.startswith(f"--- Precision Check (float32 vs float64, {results['bars']} bars) ---")
+    assert "signal agreement" in report
+
+
+def test_replay_predictions_stay_in_the_requested_dtype():
+    features, close = panel(bars=100)
+    results = replay_predictions(FakeAlgorithm(), SYMBOLS, features, close, np.float32,
+                                 horizon=4, capacity=50, n_neighbors=8, window=20, mode='zscore')
+    assert results['features'].shape == features.shape
+    assert np.abs(results['predictions']).max() <= 8
+
+
+def test_float32_pipeline_end_to_end():
+    dtype = feature_dtype('float32')
+    feature_list = ['RSI', 'WT', 'CCI', 'ADX']
+    engineer = load_feature_engineer().FeatureEngineer(None, dtype)
+    normalizer = FeatureNormalizer(FakeAlgorithm(), len(feature_list), window=50, dtype=dtype)
+    memory = KNNTrainingMemory(len(feature_list), capacity=100, dtype=dtype)
+    trainer = BackgroundTrainer(LabelStage(FakeAlgorithm(), memory, horizon=4))
+
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(size=200))
+    df = pd.DataFrame({'high': close + 1, 'low': close - 1, 'close': close})
+    matrix = engineer.feature_matrix(df, feature_list)
+    assert matrix.dtype == np.float32
+
+    for row, price in zip(matrix, close):
+        vector = normalizer.update('A', row)
+        assert vector.dtype == np.float32
+        if not np.isnan(vector).any():
+            trainer.predict(vector, 8)
+        trainer.submit('A', vector, price)
+    assert memory.features.dtype == np.float32
+    assert len(memory) > 0
+    assert not np.isnan(memory.ordered()[0]).any()
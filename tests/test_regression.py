@@ -0,0 +1,70 @@
+import numpy as np
+
+from regression import TREND_BEARISH, TREND_BULLISH, KernelBank, KernelOutputStore, NadarayaWatsonRationalQuadratic
+
+
+def random_walk(bars=500, seed=0):
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(size=bars))
+
+
+def test_crossovers_matrix():
+    estimates = np.array([[1.0, 3.0], [2.0, 2.0]])
+    crosses = KernelBank.crossovers(estimates)
+    assert crosses[0, 1] == 1
+    assert crosses[1, 0] == -1
+
+
+def test_full_window_leaves_the_signal_columns_valid():
+    nw = NadarayaWatsonRationalQuadratic(None, variants=[('gaussian', 3.0, 0.0)])
+    crossed = 0
+    for value in random_walk():
+        results = nw.update(value)
+        assert not np.isnan(results['estimates'][:, -3:]).any() or len(nw.get_state()['window']) < nw.window_size
+        crossed += int(np.abs(nw.crossovers(results)).sum() > 0)
+    assert crossed > 0
+
+
+def test_update_output_matches_calculate():
+    full = NadarayaWatsonRationalQuadratic(None)
+    live = NadarayaWatsonRationalQuadratic(None)
+    output = KernelOutputStore(capacity=1).allocate('A')
+    for value in random_walk(200, seed=1):
+        results = full.update(value)
+        live.update_output(value, output)
+        assert output.trend == results['trend'][-1]
+        assert output.alert == results['alert_stream'][-1]
+
+
+def test_rising_series_is_bullish():
+    nw = NadarayaWatsonRationalQuadratic(None)
+    output = KernelOutputStore(capacity=1).allocate('A')
+    for bar, value in enumerate(np.linspace(100.0, 150.0, 60)):
+        nw.update_output(value, output)
+        if bar + 1 < nw.window_size:
+            assert not output.ready
+    assert output.ready
+    assert output.trend == TREND_BULLISH
+
+
+def test_falling_series_is_bearish():
+    nw = NadarayaWatsonRationalQuadratic(None)
+    output = KernelOutputStore(capacity=1).allocate('A')
+    for value in np.linspace(150.0, 100.0, 60):
+        nw.update_output(value, output)
+    assert output.ready
+    assert output.trend == TREND_BEARISH
+
+
+def test_update_output_publishes_the_bank_crossovers():
+    variants = [('gaussian', 3.0, 0.0), ('gaussian', 12.0, 0.0)]
+    full = NadarayaWatsonRationalQuadratic(None, variants=variants)
+    live = NadarayaWatsonRationalQuadratic(None, variants=variants)
+    store = KernelOutputStore(capacity=1, members=4)
+    output = store.allocate('A')
+    crossed = 0
+    for value in random_walk(300, seed=2):
+        expected = full.crossovers(full.update(value))
+        live.update_output(value, output)
+        np.testing.assert_array_equal(output.crossovers, expected)
+        crossed += len(store.crossing())
+    assert crossed > 0
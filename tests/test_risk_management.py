@@ -0,0 +1,20 @@
+import numpy as np
+
+from conftest import FakeAlgorithm
+from risk_management import LorentzianAdaptiveRiskManager
+from symbol_registry import SymbolRegistry
+
+
+def test_removed_symbol_row_is_reset_before_its_slot_is_reused():
+    registry = SymbolRegistry(capacity=2)
+    manager = LorentzianAdaptiveRiskManager(FakeAlgorithm(), volatility_lookback=4, registry=registry)
+    slot = manager._slot('A')
+    for price in (100.0, 101.0, 99.0):
+        manager._update_volatility(slot, price)
+    assert manager.volatility_counts[slot] == 3
+
+    manager.remove_symbol('A')
+    registry.remove('A')
+    assert manager._slot('B') == slot
+    assert manager.volatility_counts[slot] == 0
+    assert np.isnan(manager.volatility_prices[slot]).all()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from conftest import FakeAlgorithm
+from knn_memory import KNNTrainingMemory
+from labels import LabelStage
+from training_worker import BackgroundTrainer
+
+SYMBOLS = ['A', 'B']
+
+
+def run(background, bars=300, seed=0):
+    rng = np.random.default_rng(seed)
+    memory = KNNTrainingMemory(3, capacity=100)
+    trainer = BackgroundTrainer(LabelStage(FakeAlgorithm(), memory, horizon=4), background=background)
+    predictions = []
+    for _ in range(bars):
+        trainer.begin_bar()
+        rows = [(symbol, rng.normal(size=3), 100.0 + rng.normal()) for symbol in SYMBOLS]
+        # Every symbol predicts before any of the bar's updates are submitted
+        predictions.extend(trainer.predict(features, 8) for _, features, _ in rows)
+        for symbol, features, close in rows:
+            trainer.submit(symbol, features, close)
+        trainer.end_bar()
+    trainer.close()
+    return np.array(predictions), memory
+
+
+def test_background_matches_synchronous():
+    sync_predictions, sync_memory = run(background=False)
+    background_predictions, background_memory = run(background=True)
+    assert np.abs(sync_predictions).sum() > 0
+    np.testing.assert_array_equal(background_predictions, sync_predictions)
+    np.testing.assert_array_equal(background_memory.features, sync_memory.features)
+    np.testing.assert_array_equal(background_memory.labels, sync_memory.labels)
+
+
+def test_publish_exposes_memory_changed_outside_the_worker():
+    memory = KNNTrainingMemory(1, capacity=10)
+    trainer = BackgroundTrainer(LabelStage(FakeAlgorithm(), memory, horizon=1), background=True)
+    memory.append_batch(np.zeros((3, 1)), np.ones(3, dtype=np.int8))
+    assert trainer.predict(np.zeros(1), 3) == 0
+    trainer.publish()
+    assert trainer.predict(np.zeros(1), 3) == 3
+    trainer.close()
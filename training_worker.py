@@ -0,0 +1,79 @@
+# region imports
+from AlgorithmImports import *
+# endregion
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from knn_memory import KNNMemorySnapshot
+from labels import LabelStage
+
+
+class BackgroundTrainer:
+    # Double-buffered KNN memory. In background mode predictions read an immutable
+    # snapshot while a single worker thread applies the previous bar's label
+    # updates to the memory and builds the next snapshot. begin_bar() waits for
+    # that job, so bar t always queries exactly the updates through bar t-1,
+    # whatever the thread timing, and results match the synchronous mode.
+    def __init__(self, label_stage: LabelStage, background: bool = False):
+        self.label_stage = label_stage
+        self.memory = label_stage.memory
+        self.background = background
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="knn-trainer") if background else None
+        # (symbol, features, close) submitted during the current bar
+        self.pending: List[Tuple[Symbol, np.ndarray, float]] = []
+        self.job: Optional[Future] = None
+        self.version = 0
+        self.snapshot: KNNMemorySnapshot = self.memory.snapshot(self.version)
+
+    def begin_bar(self):
+        # Call before anything reads or changes the label stage during the bar
+        if self.job is not None:
+            job, self.job = self.job, None
+            self.snapshot = job.result()
+
+    def predict(self, query: np.ndarray, n_neighbors: int) -> int:
+        # Call for every symbol of the bar before its updates are submitted
+        if self.background:
+            return self.snapshot.predict(query, n_neighbors)
+        return self.memory.predict(query, n_neighbors)
+
+    def submit(self, symbol: Symbol, features: np.ndarray, close: float):
+        if not self.background:
+            self.label_stage.update(symbol, features, close)
+            return
+        self.pending.append((symbol, np.array(features), float(close)))
+
+    def end_bar(self):
+        # Hands the bar's updates to the worker; nothing may touch the label stage until begin_bar()
+        if not self.background or not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.job = self.executor.submit(self._apply, batch, self.version + 1)
+        self.version += 1
+
+    def _apply(self, batch: List[Tuple[Symbol, np.ndarray, float]], version: int) -> KNNMemorySnapshot:
+        for symbol, features, close in batch:
+            self.label_stage.update(symbol, features, close)
+        return self.memory.snapshot(version)
+
+    def flush(self):
+        # Applies everything submitted so far and waits for it, e.g. before a checkpoint
+        self.begin_bar()
+        if self.pending:
+            self.end_bar()
+            self.begin_bar()
+
+    def publish(self):
+        # Re-snapshots after the memory was changed outside the worker (history seed, restore)
+        self.flush()
+        self.version += 1
+        self.snapshot = self.memory.snapshot(self.version)
+
+    def remove(self, symbol: Symbol):
+        self.flush()
+        self.label_stage.remove(symbol)
+
+    def close(self):
+        self.flush()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)